@@ -0,0 +1 @@
+python3 src/bench.py --out bench_results/latest.json "$@"
@@ -1 +1 @@
-python3 src/main.py "/SiteGenerator/"
\ No newline at end of file
+python3 src/main.py build "/SiteGenerator/"
\ No newline at end of file
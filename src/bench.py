@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from copystatic import copy_files, sync_files
+from corpus import CorpusGenerator, CorpusOptions, generate_site
+from manifest import plan_build, record_page
+from flatdoc import markdown_to_flat_document
+from markdown_blocks import find_pages
+from parallel import generate_pages_parallel
+from utility import markdown_to_blocks, text_to_textnodes
+
+def measure(func, repeat=5, number=1, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "max": max(times),
+        "repeat": repeat,
+        "number": number,
+    }
+
+def micro_benchmarks(options, repeat):
+    generator = CorpusGenerator(options)
+    markdown = "\n\n".join(generator.page(i) for i in range(20))
+    paragraph = " ".join(generator.sentence() for _ in range(200))
+    # The parse and serialize steps generate_page runs for every page.
+    document = markdown_to_flat_document(markdown)
+    return {
+        "text_to_textnodes": measure(lambda: text_to_textnodes(paragraph), repeat, 5),
+        "markdown_to_blocks": measure(lambda: markdown_to_blocks(markdown), repeat, 5),
+        "markdown_to_flat_document": measure(lambda: markdown_to_flat_document(markdown), repeat, 5),
+        "FlatDocument.to_html": measure(document.to_html, repeat, 5),
+    }
+
+def build(content, template_path, public, jobs, manifest=None):
+    pages = find_pages(content, public)
+    to_render, _, manifest = plan_build(pages, "/", manifest)
+    for result in generate_pages_parallel(to_render, template_path, "/", jobs):
+        record_page(manifest, result["source"], result["dest"], result["deps"])
+    return manifest
+
+def site_benchmarks(options, repeat, jobs):
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        content, static, template_path = generate_site(root, options)
+        public = os.path.join(root, "docs")
+        results["copy_files"] = measure(lambda: copy_files(static, public), repeat)
+        sync_dest = os.path.join(root, "synced")
+        results["sync_files (no changes)"] = measure(
+            lambda: sync_files(static, sync_dest, link_mode="copy"),
+            repeat,
+            setup=lambda: sync_files(static, sync_dest, link_mode="copy"),
+        )
+        results["build (serial)"] = measure(lambda: build(content, template_path, public, 1), repeat)
+        if jobs != 1:
+            results[f"build (jobs={jobs})"] = measure(
+                lambda: build(content, template_path, public, jobs), repeat
+            )
+        manifest = build(content, template_path, public, 1)
+        results["build (incremental, no changes)"] = measure(
+            lambda: build(content, template_path, public, 1, manifest), repeat
+        )
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(options, repeat=5, jobs=1):
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": vars(options),
+        "micro": micro_benchmarks(options, repeat),
+        "site": site_benchmarks(options, repeat, jobs),
+    }
+
+def compare(old, new, threshold=0.10):
+    # Compares median times; returns (name, old, new, ratio) rows and the
+    # names that got slower than the threshold allows.
+    rows = []
+    regressions = []
+    for group in ("micro", "site"):
+        for name, result in new.get(group, {}).items():
+            previous = old.get(group, {}).get(name)
+            if previous is None:
+                continue
+            ratio = result["median"] / previous["median"] if previous["median"] else float("inf")
+            rows.append((name, previous["median"], result["median"], ratio))
+            if ratio > 1 + threshold:
+                regressions.append(name)
+    return rows, regressions
+
+def format_results(results):
+    lines = [f"revision {results['revision']}, Python {results['python']}"]
+    for group in ("micro", "site"):
+        for name, result in results[group].items():
+            lines.append(f"  {name:<34} median {result['median'] * 1000:10.3f}ms  min {result['min'] * 1000:10.3f}ms")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site generator on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--link-density", type=float, default=0.2)
+    parser.add_argument("--image-density", type=float, default=0.05)
+    parser.add_argument("--code-blocks", type=int, default=1)
+    parser.add_argument("--list-size", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--out", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with an earlier JSON result")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+    options = CorpusOptions(
+        pages=args.pages,
+        seed=args.seed,
+        depth=args.depth,
+        link_density=args.link_density,
+        image_density=args.image_density,
+        code_blocks=args.code_blocks,
+        list_size=args.list_size,
+    )
+    results = run(options, args.repeat, args.jobs)
+    print(format_results(results))
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=1)
+    if args.compare:
+        with open(args.compare) as file:
+            old = json.load(file)
+        rows, regressions = compare(old, results, args.threshold)
+        print(f"Compared with {args.compare} (revision {old.get('revision')}):")
+        for name, before, after, ratio in rows:
+            print(f"  {name:<34} {before * 1000:10.3f}ms -> {after * 1000:10.3f}ms  x{ratio:.2f}")
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import os
+import shutil
+from collections import OrderedDict
+from manifest import GENERATOR_VERSION, hash_bytes
+
+_block_caches = {}
+
+class BlockCache():
+    # Maps the hash of a block's markdown to its rendered HTML. Entries live
+    # in an in-memory LRU in front of an optional on-disk store; the store is
+    # namespaced by generator version so upgrades never reuse stale HTML.
+    def __init__(self, path=None, max_entries=4096, max_disk_entries=100000, min_block_size=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.min_block_size = min_block_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, block):
+        return hash_bytes(f"{GENERATOR_VERSION}\0{block}".encode())
+
+    def version_dir(self):
+        return os.path.join(self.path, f"v{GENERATOR_VERSION}")
+
+    def entry_path(self, key):
+        return os.path.join(self.version_dir(), key[:2], key[2:] + ".html")
+
+    def remember(self, key, html):
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            return html
+        if self.path is None:
+            return None
+        entry_path = self.entry_path(key)
+        try:
+            with open(entry_path, encoding="utf-8") as file:
+                html = file.read()
+        except FileNotFoundError:
+            return None
+        os.utime(entry_path)
+        self.remember(key, html)
+        return html
+
+    def put(self, key, html):
+        self.remember(key, html)
+        if self.path is None:
+            return
+        entry_path = self.entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(html)
+        os.replace(tmp_path, entry_path)
+
+    def block_html(self, text, render_html):
+        key = self.key(text)
+        html = self.get(key)
+        if html is None:
+            self.misses += 1
+            html = render_html()
+            self.put(key, html)
+        else:
+            self.hits += 1
+        return html
+
+    def prune(self):
+        if self.path is None or not os.path.isdir(self.path):
+            return 0
+        current = os.path.basename(self.version_dir())
+        for entry in os.scandir(self.path):
+            if entry.is_dir() and entry.name != current:
+                shutil.rmtree(entry.path)
+        files = []
+        for root, _, filenames in os.walk(self.version_dir()):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                files.append((os.stat(path).st_mtime, path))
+        excess = len(files) - self.max_disk_entries
+        if excess <= 0:
+            return 0
+        files.sort()
+        for _, path in files[:excess]:
+            os.remove(path)
+        return excess
+
+def get_block_cache(path):
+    # One cache per process and path, so worker processes keep their LRU
+    # warm across batches.
+    if path is None:
+        return None
+    if path not in _block_caches:
+        _block_caches[path] = BlockCache(path)
+    return _block_caches[path]
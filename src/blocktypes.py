@@ -0,0 +1,100 @@
+from enum import Enum
+
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+
+# Bump whenever a change to block scanning, inline parsing or anything else
+# between the markdown and its HTML renders some markdown differently. The
+# manifest and the block cache are keyed by it (see GENERATOR_VERSION), so
+# incremental builds and cached blocks never keep HTML from an older parser.
+PARSER_VERSION = "3"
+
+class BlockType(Enum):
+    PARAGRAPH = "paragraph"
+    HEADING = "heading"
+    CODE = "code"
+    QUOTE = "quote"
+    ULIST = "unordered_list"
+    OLIST = "ordered_list"
+
+class Block():
+    __slots__ = ("block_type", "lines")
+
+    def __init__(self, block_type, lines):
+        self.block_type = block_type
+        self.lines = lines
+
+    @property
+    def text(self):
+        return "\n".join(self.lines)
+
+    def __eq__(self, other):
+        return self.block_type == other.block_type and self.lines == other.lines
+
+    def __repr__(self):
+        return f"Block({self.block_type.value}, {self.lines})"
+
+def is_ordered_item(line, counter):
+    number, separator, _ = line.partition(". ")
+    return (separator != "" and number.isdigit() and number[0] != "0"
+            and int(number) == counter)
+
+def lines_to_block_type(lines):
+    first = lines[0]
+    if first.startswith(HEADING_PREFIXES):
+        return BlockType.HEADING
+    if first.startswith("```") and lines[-1].endswith("```"):
+        return BlockType.CODE
+    if first.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH
+        return BlockType.QUOTE
+    if first.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
+        return BlockType.ULIST
+    if first.startswith("1. "):
+        for counter, line in enumerate(lines, 1):
+            if not is_ordered_item(line, counter):
+                return BlockType.PARAGRAPH
+        return BlockType.OLIST
+    return BlockType.PARAGRAPH
+
+def block_to_block_type(block):
+    return lines_to_block_type(block.split("\n"))
+
+def closes_fence(line, is_opening_line=False):
+    if is_opening_line:
+        return len(line) >= 6 and line.endswith("```")
+    return line.endswith("```")
+
+def scan_blocks(lines, fences=True):
+    # Single pass over the lines: each line is stripped once, blank lines
+    # end a block except inside a ``` fence, and every finished block is
+    # classified from the lines already collected.
+    current = []
+    in_fence = False
+    for line in lines:
+        line = line.strip()
+        if in_fence:
+            current.append(line)
+            if closes_fence(line):
+                in_fence = False
+            continue
+        if not line:
+            if current:
+                yield Block(lines_to_block_type(current), current)
+                current = []
+            continue
+        if fences and not current and line.startswith("```"):
+            in_fence = not closes_fence(line, True)
+        current.append(line)
+    if in_fence:
+        # An unclosed fence is not code; split what was buffered at blank
+        # lines like any other text.
+        while current and not current[-1]:
+            current.pop()
+        yield from scan_blocks(current, fences=False)
+    elif current:
+        yield Block(lines_to_block_type(current), current)
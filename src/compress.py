@@ -0,0 +1,91 @@
+import gzip
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from manifest import load_manifest, save_manifest
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE = (".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map")
+MIN_SIZE = 1024
+LEVEL = 9
+
+# (min_size, level) while a --compress build or watch is running. Every
+# writer then refreshes a file's .gz sibling as soon as it has written it.
+settings = None
+
+def activate(value):
+    global settings
+    settings = value
+
+def is_compressible(name, size, min_size=MIN_SIZE):
+    return size >= min_size and name.endswith(COMPRESSIBLE)
+
+def gzip_file(path, level=LEVEL, chunk_size=1024 * 1024):
+    # mtime=0 leaves the timestamp out of the header, so identical input
+    # always produces an identical .gz.
+    tmp_path = path + ".gz.tmp"
+    with open(path, "rb") as source, open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(filename="", mode="wb", compresslevel=level, fileobj=raw, mtime=0) as file:
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                file.write(chunk)
+    os.replace(tmp_path, path + ".gz")
+
+def remove_sibling(path):
+    if path.endswith(COMPRESSIBLE) and os.path.exists(path + ".gz"):
+        os.remove(path + ".gz")
+        return True
+    return False
+
+def sibling_current(path, stat):
+    # A sibling is only ever written after its file, so one that is older
+    # than the file is stale.
+    try:
+        return os.stat(path + ".gz").st_mtime_ns >= stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def refresh_file(path, stat, min_size=MIN_SIZE, level=LEVEL, written=False):
+    # Returns "compressed", "unchanged", "removed" or None for files that
+    # never get a sibling.
+    if not is_compressible(path, stat.st_size, min_size):
+        return "removed" if remove_sibling(path) else None
+    if not written and sibling_current(path, stat):
+        return "unchanged"
+    gzip_file(path, level)
+    return "compressed"
+
+def compress_written(path, written=True):
+    # Called by the writers once path holds its content; does nothing
+    # unless compression is active. A rewritten file is compressed straight
+    # away, while it is still in the page cache.
+    if settings is not None:
+        refresh_file(path, os.stat(path), *settings, written)
+
+def compress_outputs(root, state_path=None, min_size=MIN_SIZE, level=LEVEL, workers=None):
+    # The writers keep siblings current, so this pass is only for outputs
+    # nothing rewrote, and only runs when their siblings may be missing or
+    # stale: on the first --compress build, after a build without it and
+    # when the settings change. It then walks root and refreshes every
+    # sibling that is missing or older than its file.
+    start = time.perf_counter()
+    stats = {"compressed": 0, "unchanged": 0, "removed": 0}
+    current = {"min_size": min_size, "level": level}
+    if state_path is None or load_manifest(state_path) != current:
+        paths = [
+            os.path.join(dir_path, name)
+            for dir_path, _, names in os.walk(root)
+            for name in names
+            if name.endswith(COMPRESSIBLE)
+        ]
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            for outcome in executor.map(
+                lambda path: refresh_file(path, os.stat(path), min_size, level), paths
+            ):
+                if outcome is not None:
+                    stats[outcome] += 1
+        if state_path is not None:
+            save_manifest(state_path, current)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
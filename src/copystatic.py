@@ -1,15 +1,194 @@
+import logging
 import os
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from compress import compress_written, remove_sibling
+from manifest import hash_file, load_manifest, save_manifest
 
-def copy_files(source, destination):
-    if os.path.exists(destination):
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IGNORE = ("*:Zone.Identifier", ".DS_Store", "Thumbs.db", "*~")
+LINK_MODES = ("auto", "copy", "hardlink", "reflink")
+FICLONE = 0x40049409
+LARGE_FILE_SIZE = 1024 * 1024
+BATCH_FILES = 64
+BATCH_BYTES = 4 * 1024 * 1024
+
+def copy_files(source, destination, clean=True):
+    if clean and os.path.exists(destination):
         shutil.rmtree(destination)
     os.makedirs(destination, exist_ok=True)
     for filename in os.listdir(source):
         from_path = os.path.join(source, filename)
         dest_path = os.path.join(destination, filename)
-        print(f" * {from_path} -> {dest_path}")
+        logger.debug(" * %s -> %s", from_path, dest_path)
         if os.path.isfile(from_path):
             shutil.copy(from_path, dest_path)
         else:
-            copy_files(from_path, dest_path)
+            copy_files(from_path, dest_path, clean)
+
+def is_ignored(name, ignore):
+    return any(fnmatch(name, pattern) for pattern in ignore)
+
+def scan_files(source, ignore=DEFAULT_IGNORE, rel_dir=""):
+    files = []
+    with os.scandir(source) as entries:
+        for entry in entries:
+            if is_ignored(entry.name, ignore):
+                continue
+            rel_path = os.path.join(rel_dir, entry.name)
+            if entry.is_dir():
+                files.extend(scan_files(entry.path, ignore, rel_path))
+            elif entry.is_file():
+                files.append((rel_path, entry.path, entry.stat()))
+    return files
+
+def needs_copy(from_path, from_stat, dest_path, use_hash):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return True
+    if (dest_stat.st_ino, dest_stat.st_dev) == (from_stat.st_ino, from_stat.st_dev):
+        return False
+    if dest_stat.st_size != from_stat.st_size:
+        return True
+    if dest_stat.st_mtime_ns == from_stat.st_mtime_ns:
+        return False
+    if use_hash and hash_file(from_path) == hash_file(dest_path):
+        shutil.copystat(from_path, dest_path)
+        return False
+    return True
+
+def reflink_file(from_path, dest_path):
+    if fcntl is None:
+        return False
+    try:
+        with open(from_path, "rb") as src, open(dest_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        return False
+    shutil.copystat(from_path, dest_path)
+    return True
+
+def hardlink_file(from_path, dest_path):
+    try:
+        os.link(from_path, dest_path)
+    except OSError:
+        return False
+    return True
+
+def kernel_copy(from_path, dest_path, size):
+    # copy_file_range lets the kernel (or an NFS/SMB server) move the data
+    # without it passing through user space; sendfile is the older fallback.
+    copy_file_range = getattr(os, "copy_file_range", None)
+    with open(from_path, "rb") as src, open(dest_path, "wb") as dst:
+        offset = 0
+        try:
+            while offset < size:
+                if copy_file_range is not None:
+                    sent = copy_file_range(src.fileno(), dst.fileno(), size - offset)
+                else:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except (OSError, AttributeError):
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+            shutil.copyfileobj(src, dst)
+    shutil.copystat(from_path, dest_path)
+
+def place_file(from_path, dest_path, link_mode, size=0):
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if link_mode == "hardlink" and hardlink_file(from_path, dest_path):
+        return
+    if link_mode in ("reflink", "auto") and reflink_file(from_path, dest_path):
+        return
+    if size >= LARGE_FILE_SIZE:
+        kernel_copy(from_path, dest_path, size)
+    else:
+        shutil.copy2(from_path, dest_path)
+
+def batch_copies(copies):
+    # Large files get a task each; small ones are grouped so per-task
+    # overhead doesn't dominate on trees of many tiny assets.
+    batches = []
+    batch = []
+    batch_bytes = 0
+    for copy in copies:
+        size = copy[2]
+        if size >= LARGE_FILE_SIZE:
+            batches.append([copy])
+            continue
+        batch.append(copy)
+        batch_bytes += size
+        if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+            batches.append(batch)
+            batch = []
+            batch_bytes = 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+def copy_batch(batch, link_mode):
+    for from_path, dest_path, size in batch:
+        place_file(from_path, dest_path, link_mode, size)
+        compress_written(dest_path)
+
+def copy_parallel(copies, link_mode="auto", workers=8):
+    for dest_dir in sorted({os.path.dirname(dest_path) for _, dest_path, _ in copies}):
+        os.makedirs(dest_dir, exist_ok=True)
+    batches = batch_copies(copies)
+    if workers <= 1 or len(batches) <= 1:
+        for batch in batches:
+            copy_batch(batch, link_mode)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(copy_batch, batch, link_mode) for batch in batches]:
+            future.result()
+
+def sync_files(source, destination, manifest_path=None, ignore=DEFAULT_IGNORE,
+               use_hash=False, link_mode="auto", workers=8):
+    # Copies only new or changed files. Files recorded by the previous sync
+    # whose source has disappeared are pruned; anything else in the
+    # destination (such as generated pages) is left alone.
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"unknown link mode {link_mode}, expected one of {LINK_MODES}")
+    start = time.perf_counter()
+    stats = {"copied": 0, "unchanged": 0, "removed": 0, "bytes": 0}
+    files = scan_files(source, ignore)
+    copies = []
+    for rel_path, from_path, from_stat in files:
+        dest_path = os.path.join(destination, rel_path)
+        if needs_copy(from_path, from_stat, dest_path, use_hash):
+            copies.append((from_path, dest_path, from_stat.st_size))
+        else:
+            stats["unchanged"] += 1
+    copy_parallel(copies, link_mode, workers)
+    stats["copied"] = len(copies)
+    stats["bytes"] = sum(size for _, _, size in copies)
+    if manifest_path is not None:
+        current = sorted(rel_path for rel_path, _, _ in files)
+        kept = set(current)
+        previous = load_manifest(manifest_path) or {}
+        for rel_path in set(previous.get("files", [])) - kept:
+            dest_path = os.path.join(destination, rel_path)
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+                stats["removed"] += 1
+            if rel_path + ".gz" not in kept:
+                remove_sibling(dest_path)
+        save_manifest(manifest_path, {"files": current})
+    stats["seconds"] = time.perf_counter() - start
+    return stats
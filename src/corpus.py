@@ -0,0 +1,137 @@
+import os
+import random
+from png import encode_png
+
+WORDS = (
+    "elf hobbit ring wizard shire mordor river forest tower king steward "
+    "dragon mountain road journey song lore council sword star light shadow "
+    "valley bridge gate harbor map rune scroll lantern ember stone"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+class CorpusOptions():
+    def __init__(self, pages=100, seed=0, depth=3, fanout=8, paragraphs=(3, 8),
+                 sentence_words=(6, 18), link_density=0.2, image_density=0.05,
+                 code_blocks=1, code_lines=(3, 12), list_size=5, images=4, image_size=(640, 400)):
+        self.pages = pages
+        self.seed = seed
+        self.depth = depth
+        self.fanout = fanout
+        self.paragraphs = paragraphs
+        self.sentence_words = sentence_words
+        self.link_density = link_density
+        self.image_density = image_density
+        self.code_blocks = code_blocks
+        self.code_lines = code_lines
+        self.list_size = list_size
+        self.images = images
+        self.image_size = image_size
+
+class CorpusGenerator():
+    # Builds a deterministic synthetic site: the same options and seed always
+    # produce byte-identical files.
+    def __init__(self, options):
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.page_urls = [self.page_url(i) for i in range(options.pages)]
+
+    def page_dir(self, index):
+        parts = []
+        value = index
+        for _ in range(self.options.depth):
+            if value == 0:
+                break
+            parts.append(f"section{value % self.options.fanout}")
+            value //= self.options.fanout
+        return "/".join(reversed(parts))
+
+    def page_url(self, index):
+        if index == 0:
+            return "/"
+        return f"/{self.page_dir(index)}/page{index}".replace("//", "/")
+
+    def page_path(self, index):
+        if index == 0:
+            return "index.md"
+        return f"{self.page_url(index).lstrip('/')}/index.md"
+
+    def words(self, low, high):
+        return " ".join(self.random.choice(WORDS) for _ in range(self.random.randint(low, high)))
+
+    def inline(self, word):
+        roll = self.random.random()
+        options = self.options
+        if roll < options.link_density:
+            return f"[{word}]({self.random.choice(self.page_urls)})"
+        roll -= options.link_density
+        if roll < options.image_density:
+            return f"![{word}](/images/image{self.random.randrange(max(options.images, 1))}.png)"
+        roll -= options.image_density
+        if roll < 0.05:
+            return f"**{word}**"
+        if roll < 0.10:
+            return f"_{word}_"
+        if roll < 0.13:
+            return f"`{word}`"
+        return word
+
+    def sentence(self):
+        low, high = self.options.sentence_words
+        words = [self.inline(word) for word in self.words(low, high).split()]
+        return " ".join(words).capitalize() + "."
+
+    def paragraph(self):
+        return "\n".join(self.sentence() for _ in range(self.random.randint(2, 5)))
+
+    def code_block(self):
+        low, high = self.options.code_lines
+        lines = [f"let {self.random.choice(WORDS)} = {i};" for i in range(self.random.randint(low, high))]
+        return "```\n" + "\n".join(lines) + "\n```"
+
+    def page(self, index):
+        options = self.options
+        blocks = [f"# {self.words(2, 5).title()} {index}"]
+        for i in range(self.random.randint(*options.paragraphs)):
+            if i % 3 == 1:
+                blocks.append(f"## {self.words(2, 4).title()}")
+            blocks.append(self.paragraph())
+        blocks.append("\n".join(f"- {self.sentence()}" for _ in range(options.list_size)))
+        blocks.append("\n".join(f"{i}. {self.sentence()}" for i in range(1, options.list_size + 1)))
+        blocks.append(f"> {self.sentence()}\n> {self.sentence()}")
+        for _ in range(options.code_blocks):
+            blocks.insert(self.random.randint(1, len(blocks)), self.code_block())
+        return "\n\n".join(blocks) + "\n"
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with open(path, mode) as file:
+        file.write(data)
+
+def generate_site(root, options=None):
+    options = options or CorpusOptions()
+    generator = CorpusGenerator(options)
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    for index in range(options.pages):
+        write_file(os.path.join(content, generator.page_path(index)), generator.page(index))
+    write_file(os.path.join(static, "index.css"), "body { margin: 0 auto; max-width: 50em; }\n")
+    # Real RGB PNGs with noisy pixels, so --images decodes and resizes them.
+    width, height = options.image_size
+    for index in range(options.images):
+        rows = [generator.random.randbytes(width * 3) for _ in range(height)]
+        write_file(os.path.join(static, "images", f"image{index}.png"), encode_png(width, height, 3, rows))
+    template_path = os.path.join(root, "template.html")
+    write_file(template_path, TEMPLATE)
+    return content, static, template_path
@@ -0,0 +1,54 @@
+import os
+from manifest import current_hash, load_manifest
+
+class DependencyGraph():
+    # Which files every page was last rendered from (its source, template,
+    # partials, included files and images) and the reverse edges, read from
+    # the build manifests, which persist them between builds. Paths are
+    # compared as absolute paths, so relative and absolute spellings match.
+    def __init__(self):
+        self.deps = {}
+        self.outputs = {}
+        self.dependents_of = {}
+
+    def add_manifest(self, manifest):
+        for source, entry in manifest["pages"].items():
+            source = os.path.abspath(source)
+            self.outputs.setdefault(source, []).append(entry["dest"])
+            deps = self.deps.setdefault(source, {})
+            for path, digest in entry["deps"].items():
+                path = os.path.abspath(path)
+                deps[path] = digest
+                self.dependents_of.setdefault(path, set()).add(source)
+
+    def dependencies(self, source):
+        return sorted(self.deps.get(os.path.abspath(source), ()))
+
+    def dependents(self, paths):
+        # The pages that re-render when any of these files change.
+        sources = set()
+        for path in paths:
+            sources.update(self.dependents_of.get(os.path.abspath(path), ()))
+        return sorted(sources)
+
+    def changed(self, hashes=None):
+        # The pages an incremental build would re-render now, and the files
+        # that changed since they were rendered.
+        if hashes is None:
+            hashes = {}
+        sources = set()
+        paths = set()
+        for source, deps in self.deps.items():
+            for path, digest in deps.items():
+                if current_hash(path, hashes) != digest:
+                    sources.add(source)
+                    paths.add(path)
+        return sorted(sources), sorted(paths)
+
+def load_graph(manifest_paths):
+    graph = DependencyGraph()
+    for path in manifest_paths:
+        manifest = load_manifest(path)
+        if manifest is not None:
+            graph.add_manifest(manifest)
+    return graph
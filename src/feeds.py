@@ -0,0 +1,100 @@
+import datetime
+import logging
+import os
+from xml.sax.saxutils import escape
+from output import write_if_changed
+from siteindex import page_href
+
+logger = logging.getLogger(__name__)
+
+def absolute_url(site_url, basepath, href):
+    return site_url.rstrip("/") + basepath.rstrip("/") + href
+
+def page_date(entry):
+    # A "<!-- date: 2024-05-01 -->" metadata line wins over the source mtime.
+    value = None
+    date = entry["metadata"].get("date")
+    if date:
+        try:
+            value = datetime.datetime.fromisoformat(date)
+        except ValueError:
+            logger.warning(f"Ignoring invalid date {date!r} on {entry['url']}")
+    if value is None:
+        value = datetime.datetime.fromtimestamp(entry["modified"], datetime.timezone.utc)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+def format_date(value):
+    return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def sitemap_xml(index, site_url, basepath="/"):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for source, entry in sorted(index["pages"].items(), key=lambda item: item[1]["url"]):
+        loc = absolute_url(site_url, basepath, page_href(source, entry["url"]))
+        lines.append(
+            f"  <url><loc>{escape(loc)}</loc><lastmod>{format_date(page_date(entry))}</lastmod></url>"
+        )
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+def feed_entries(index, section):
+    prefix = "/" + section.strip("/") + "/"
+    entries = [
+        (source, entry) for source, entry in index["pages"].items()
+        if entry["url"].startswith(prefix)
+    ]
+    entries.sort(key=lambda item: item[1]["url"])
+    entries.sort(key=lambda item: page_date(item[1]), reverse=True)
+    return entries
+
+def author_xml(name, indent):
+    return f"{indent}<author><name>{escape(name)}</name></author>"
+
+def atom_feed(index, site_url, basepath="/", section="blog", limit=20, author=None):
+    entries = feed_entries(index, section)[:limit]
+    home = next((entry for entry in index["pages"].values() if entry["url"] == "/"), None)
+    title = home["title"] if home is not None and home["title"] else site_url
+    # Atom requires an author on the feed or on every entry. An entry's
+    # "<!-- author: ... -->" line wins; the feed falls back to the home
+    # page's author line, then to the site title.
+    if author is None and home is not None:
+        author = home["metadata"].get("author")
+    feed_url = absolute_url(site_url, basepath, "/feed.xml")
+    updated = max((page_date(entry) for _, entry in entries), default=None)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape(title)}</title>",
+        f"  <id>{escape(feed_url)}</id>",
+        f'  <link rel="self" href="{escape(feed_url)}"/>',
+        f'  <link href="{escape(absolute_url(site_url, basepath, "/"))}"/>',
+        author_xml(author or title, "  "),
+    ]
+    if updated is not None:
+        lines.append(f"  <updated>{format_date(updated)}</updated>")
+    for source, entry in entries:
+        url = absolute_url(site_url, basepath, page_href(source, entry["url"]))
+        lines.extend([
+            "  <entry>",
+            f"    <title>{escape(entry['title'] or entry['url'])}</title>",
+            f"    <id>{escape(url)}</id>",
+            f'    <link href="{escape(url)}"/>',
+            f"    <updated>{format_date(page_date(entry))}</updated>",
+        ])
+        if entry["metadata"].get("author"):
+            lines.append(author_xml(entry["metadata"]["author"], "    "))
+        lines.append("  </entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+def write_site_files(index, dir_path_public, site_url, basepath="/", section="blog", author=None):
+    for name, text in (
+        ("sitemap.xml", sitemap_xml(index, site_url, basepath)),
+        ("feed.xml", atom_feed(index, site_url, basepath, section, author=author)),
+    ):
+        write_if_changed(os.path.join(dir_path_public, name), text)
+    logger.info(f"Wrote sitemap.xml and feed.xml for {len(index['pages'])} pages")
@@ -0,0 +1,257 @@
+from array import array
+import profiling
+from blocktypes import BlockType, scan_blocks
+from htmlnode import LeafNode, ParentNode
+from profiling import stage
+from textnode import TextType
+from utility import text_to_textnodes
+
+NO_KEYS = ()
+LINK_KEYS = ("href",)
+IMAGE_KEYS = ("src", "alt")
+
+INLINE_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+
+class FlatDocument():
+    # A document stored as parallel arrays in preorder instead of a tree of
+    # node objects. Node i has tag tag_names[tags[i]] (index 0 is "no tag"),
+    # its text is strings[values[i]] for leaves (-1 marks a parent), its
+    # attributes are props[prop_ids[i]] (-1 for none), a (keys, values) pair
+    # of tuples in which every link and image shares one keys tuple, and its
+    # subtree covers nodes i + 1 up to ends[i]. Raw HTML of blocks taken from the
+    # block cache is kept as tagless leaves, with the block each came from
+    # in cached_blocks under its string index.
+    __slots__ = (
+        "tag_names", "tag_ids", "tags", "values", "strings", "prop_ids", "props", "ends",
+        "open_nodes", "cached_blocks",
+    )
+
+    def __init__(self):
+        self.tag_names = [None]
+        self.tag_ids = {None: 0}
+        self.tags = array("H")
+        self.values = array("i")
+        self.strings = []
+        self.prop_ids = array("i")
+        self.props = []
+        self.ends = array("I")
+        self.open_nodes = []
+        self.cached_blocks = {}
+
+    def __len__(self):
+        return len(self.tags)
+
+    def tag_id(self, tag):
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = len(self.tag_names)
+            self.tag_ids[tag] = tag_id
+            self.tag_names.append(tag)
+        return tag_id
+
+    def append(self, tag, value, keys=NO_KEYS, values=NO_KEYS):
+        self.tags.append(self.tag_id(tag))
+        if value is None:
+            self.values.append(-1)
+        else:
+            self.values.append(len(self.strings))
+            self.strings.append(value)
+        if keys:
+            self.prop_ids.append(len(self.props))
+            self.props.append((keys, values))
+        else:
+            self.prop_ids.append(-1)
+        self.ends.append(len(self.tags))
+
+    def open(self, tag, props=None):
+        if tag is None:
+            raise ValueError("ParentNode must have a tag")
+        self.open_nodes.append(len(self.tags))
+        if props:
+            self.append(tag, None, tuple(props), tuple(props.values()))
+        else:
+            self.append(tag, None)
+
+    def close(self):
+        self.ends[self.open_nodes.pop()] = len(self.tags)
+
+    def leaf(self, tag, value, props=None):
+        if props:
+            self.attr_leaf(tag, value, tuple(props), tuple(props.values()))
+        else:
+            self.attr_leaf(tag, value, NO_KEYS, NO_KEYS)
+
+    def attr_leaf(self, tag, value, keys, values):
+        if value is None:
+            raise ValueError("LeafNode must have a value")
+        self.append(tag, value, keys, values)
+
+    def cached_block(self, html, block):
+        self.cached_blocks[len(self.strings)] = block
+        self.leaf(None, html)
+
+    def props_to_html(self, prop_id):
+        if prop_id < 0:
+            return ""
+        keys, values = self.props[prop_id]
+        return "".join(f' {key}="{value}"' for key, value in zip(keys, values))
+
+    def node_props(self, prop_id):
+        if prop_id < 0:
+            return None
+        keys, values = self.props[prop_id]
+        return dict(zip(keys, values))
+
+    def iter_html(self):
+        if self.open_nodes:
+            raise ValueError("FlatDocument has unclosed nodes")
+        tag_names = self.tag_names
+        strings = self.strings
+        stack = []
+        for i in range(len(self.tags)):
+            while stack and self.ends[stack[-1]] <= i:
+                yield f"</{tag_names[self.tags[stack.pop()]]}>"
+            tag = tag_names[self.tags[i]]
+            value_id = self.values[i]
+            if value_id >= 0 and tag is None:
+                yield strings[value_id]
+            elif value_id >= 0:
+                props = self.props_to_html(self.prop_ids[i])
+                yield f"<{tag}{props}>{strings[value_id]}</{tag}>"
+            else:
+                yield f"<{tag}{self.props_to_html(self.prop_ids[i])}>"
+                stack.append(i)
+        while stack:
+            yield f"</{tag_names[self.tags[stack.pop()]]}>"
+
+    def to_html(self):
+        return "".join(self.iter_html())
+
+    def write_html(self, file):
+        for fragment in self.iter_html():
+            file.write(fragment)
+
+    def text(self):
+        # The text of cached blocks is parsed again from their markdown, so
+        # it matches an uncached render and never includes markup.
+        if not self.cached_blocks:
+            return " ".join(self.strings)
+        return " ".join(
+            block_document(self.cached_blocks[i]).text() if i in self.cached_blocks else string
+            for i, string in enumerate(self.strings)
+        )
+
+    def append_node(self, node):
+        if isinstance(node, LeafNode):
+            self.leaf(node.tag, node.value, node.props)
+            return
+        self.open(node.tag, node.props)
+        for child in node.children:
+            self.append_node(child)
+        self.close()
+
+    def to_node(self, i=0):
+        # The node tree rooted at node i, the inverse of from_node.
+        if self.open_nodes:
+            raise ValueError("FlatDocument has unclosed nodes")
+        tag = self.tag_names[self.tags[i]]
+        props = self.node_props(self.prop_ids[i])
+        if self.values[i] >= 0:
+            return LeafNode(tag, self.strings[self.values[i]], props)
+        children = []
+        child = i + 1
+        while child < self.ends[i]:
+            children.append(self.to_node(child))
+            child = self.ends[child]
+        return ParentNode(tag, children, props)
+
+    @classmethod
+    def from_node(cls, node):
+        document = cls()
+        document.append_node(node)
+        return document
+
+def append_inline(document, text):
+    with stage("inline parse"):
+        text_nodes = text_to_textnodes(text)
+    for text_node in text_nodes:
+        text_type = text_node.text_type
+        if text_type in INLINE_TAGS:
+            document.leaf(INLINE_TAGS[text_type], text_node.text)
+        elif text_type is TextType.LINK:
+            if not text_node.url:
+                raise ValueError("A link must have a url")
+            document.attr_leaf("a", text_node.text, LINK_KEYS, (text_node.url,))
+        elif text_type is TextType.IMAGE:
+            if not text_node.url:
+                raise ValueError("An image must have a url")
+            document.attr_leaf("img", "", IMAGE_KEYS, (text_node.url, text_node.text))
+        else:
+            raise Exception("Wrong text type")
+
+def append_inline_block(document, tag, text):
+    document.open(tag)
+    append_inline(document, text)
+    document.close()
+
+def append_block(document, block):
+    # The block renderer: every page, and markdown_to_html_node, goes
+    # through here.
+    lines = block.lines
+    match block.block_type:
+        case BlockType.PARAGRAPH:
+            append_inline_block(document, "p", " ".join(lines).strip())
+        case BlockType.HEADING:
+            first = lines[0]
+            level = len(first) - len(first.lstrip("#"))
+            append_inline_block(document, f"h{level}", block.text[level + 1:])
+        case BlockType.CODE:
+            code_content = "\n".join(lines[1:-1]) + "\n" if len(lines) >= 3 else ""
+            document.open("pre")
+            document.leaf("code", code_content)
+            document.close()
+        case BlockType.QUOTE:
+            quote_lines = [line[2:] if line.startswith("> ") else line for line in lines]
+            append_inline_block(document, "blockquote", " ".join(quote_lines))
+        case BlockType.ULIST:
+            append_list(document, "ul", lines)
+        case BlockType.OLIST:
+            append_list(document, "ol", lines)
+
+def append_list(document, tag, lines):
+    document.open(tag)
+    for line in lines:
+        marker = line.index(" ") + 1
+        if len(line) > marker:
+            append_inline_block(document, "li", line[marker:].strip())
+    document.close()
+
+def block_document(block):
+    document = FlatDocument()
+    append_block(document, block)
+    return document
+
+def block_to_html(block):
+    return block_document(block).to_html()
+
+def markdown_to_flat_document(markdown, block_cache=None):
+    document = FlatDocument()
+    document.open("div")
+    blocks = scan_blocks(markdown.split("\n"))
+    if profiling.active() is not None:
+        with stage("block split"):
+            blocks = list(blocks)
+    for block in blocks:
+        if block_cache is not None:
+            text = block.text
+            if len(text) >= block_cache.min_block_size:
+                document.cached_block(block_cache.block_html(text, lambda: block_to_html(block)), block)
+                continue
+        append_block(document, block)
+    document.close()
+    return document
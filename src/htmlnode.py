@@ -1,4 +1,8 @@
+NO_CHILDREN = ()
+
 class HTMLNode():
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -7,6 +11,13 @@ class HTMLNode():
 
     def to_html(self):
         raise NotImplementedError
+
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_html(self, file):
+        for fragment in self.iter_html():
+            file.write(fragment)
     
     def props_to_html(self):
         if self.props is None:
@@ -20,8 +31,10 @@ class HTMLNode():
         return f"{self.tag}, {self.value}, {self.children}, {self.props}"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, children=[], props=props)
+        super().__init__(tag, value, children=NO_CHILDREN, props=props)
 
     def to_html(self):
         if self.value is None:
@@ -31,15 +44,20 @@ class LeafNode(HTMLNode):
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
     
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, value=None, children=children, props=props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
         if self.children is None:
             raise ValueError("ParentNode must have a children value")
-        html_children = ""
+        yield f"<{self.tag}{self.props_to_html()}>"
         for child in self.children:
-            html_children += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{html_children}</{self.tag}>"
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
@@ -0,0 +1,170 @@
+import logging
+import os
+import re
+import time
+from copystatic import DEFAULT_IGNORE, scan_files
+from manifest import hash_bytes, load_manifest, save_manifest
+from output import write_if_changed
+from png import decode_png, encode_png, png_size, resize
+from utility import extract_markdown_images
+
+logger = logging.getLogger(__name__)
+
+IMAGES_VERSION = "1"
+DEFAULT_WIDTHS = (480, 960)
+
+img_pattern = re.compile(r'<img src="([^"]*)"')
+
+def variant_path(rel_path, width):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}-{width}w{ext}"
+
+def rel_url(rel_path):
+    return "/" + rel_path.replace(os.sep, "/")
+
+class ImageCatalog():
+    # Intrinsic sizes of the PNG files under the static directory, keyed by
+    # URL ("/images/tom.png"), and the downscaled variants written for them.
+    # After refresh() the catalog is plain data, so it can be sent to
+    # worker processes along with the pages. cache_dir holds the state of
+    # this output; variant_dir, which defaults to cache_dir/variants, can be
+    # shared by every target built from the same static files.
+    def __init__(self, dir_path_static, dir_path_public, cache_dir=None, widths=(),
+                 ignore=DEFAULT_IGNORE, variant_dir=None):
+        self.dir_path_static = dir_path_static
+        self.dir_path_public = dir_path_public
+        self.cache_dir = cache_dir
+        if variant_dir is None and cache_dir is not None:
+            variant_dir = os.path.join(cache_dir, "variants")
+        self.variant_dir = variant_dir
+        self.widths = tuple(sorted(widths))
+        self.ignore = ignore
+        self.images = {}
+
+    def state_path(self):
+        return None if self.cache_dir is None else os.path.join(self.cache_dir, "images.json")
+
+    def variant_cache_path(self, digest, width):
+        return os.path.join(self.variant_dir, digest[:2], f"{digest[2:]}-{width}.png")
+
+    def make_variant(self, decoded, digest, width):
+        # Variants are cached by the source's content hash and width, so an
+        # image is only decoded and resized again when its bytes change.
+        # `decoded` is called at most once per image, on the first miss.
+        cache_path = None if self.variant_dir is None else self.variant_cache_path(digest, width)
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path, "rb") as file:
+                return file.read()
+        source_width, source_height, channels, rows = decoded()
+        new_width, new_height, new_rows = resize(source_width, source_height, channels, rows, width)
+        encoded = encode_png(new_width, new_height, channels, new_rows)
+        if cache_path is not None:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path + ".tmp", "wb") as file:
+                file.write(encoded)
+            os.replace(cache_path + ".tmp", cache_path)
+        return encoded
+
+    def process(self, rel_path, from_path, stamp):
+        with open(from_path, "rb") as file:
+            data = file.read()
+        width, height = png_size(data[:24])
+        digest = hash_bytes(data)
+        entry = {"stamp": stamp, "hash": digest, "width": width, "height": height, "variants": []}
+        pixels = []
+
+        def decoded():
+            if not pixels:
+                pixels.append(decode_png(data))
+            return pixels[0]
+
+        for variant_width in self.widths:
+            if variant_width >= width:
+                break
+            try:
+                variant = self.make_variant(decoded, digest, variant_width)
+            except ValueError as e:
+                logger.debug("No variants for %s: %s", from_path, e)
+                break
+            variant_rel_path = variant_path(rel_path, variant_width)
+            dest_path = os.path.join(self.dir_path_public, variant_rel_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            write_if_changed(dest_path, variant)
+            entry["variants"].append([variant_rel_path, variant_width, png_size(variant[:24])[1]])
+        return entry
+
+    def outputs_exist(self, entry):
+        return all(
+            os.path.exists(os.path.join(self.dir_path_public, rel_path))
+            for rel_path, _, _ in entry["variants"]
+        )
+
+    def refresh(self):
+        # Re-reads only images whose size or mtime changed since the last
+        # refresh, and removes variants of images that are gone.
+        start = time.perf_counter()
+        state = (load_manifest(self.state_path()) if self.cache_dir is not None else None) or {}
+        old_entries = {}
+        if state.get("version") == IMAGES_VERSION and state.get("widths") == list(self.widths):
+            old_entries = state["images"]
+        entries = {}
+        stats = {"processed": 0, "unchanged": 0, "removed": 0}
+        for rel_path, from_path, stat in scan_files(self.dir_path_static, self.ignore):
+            if not rel_path.lower().endswith(".png"):
+                continue
+            stamp = [stat.st_mtime_ns, stat.st_size]
+            entry = old_entries.get(rel_path)
+            if entry is not None and entry["stamp"] == stamp and self.outputs_exist(entry):
+                stats["unchanged"] += 1
+            else:
+                try:
+                    entry = self.process(rel_path, from_path, stamp)
+                except ValueError as e:
+                    logger.warning(f"Skipping image {from_path}: {e}")
+                    continue
+                stats["processed"] += 1
+            entries[rel_path] = entry
+        current = {rel_path for entry in entries.values() for rel_path, _, _ in entry["variants"]}
+        for entry in state.get("images", {}).values():
+            for rel_path, _, _ in entry["variants"]:
+                dest_path = os.path.join(self.dir_path_public, rel_path)
+                if rel_path not in current and os.path.exists(dest_path):
+                    os.remove(dest_path)
+                    stats["removed"] += 1
+        if self.cache_dir is not None:
+            save_manifest(self.state_path(), {
+                "version": IMAGES_VERSION,
+                "widths": list(self.widths),
+                "images": entries,
+            })
+        self.images = {rel_url(rel_path): entry for rel_path, entry in entries.items()}
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    def attributes(self, src, basepath):
+        entry = self.images.get(src)
+        if entry is None:
+            return ' loading="lazy"'
+        width = entry["width"]
+        attributes = f' width="{width}" height="{entry["height"]}" loading="lazy"'
+        if entry["variants"]:
+            prefix = basepath.rstrip("/")
+            candidates = [f"{prefix}{rel_url(path)} {w}w" for path, w, _ in entry["variants"]]
+            candidates.append(f"{prefix}{src} {width}w")
+            attributes += f' srcset="{", ".join(candidates)}" sizes="(max-width: {width}px) 100vw, {width}px"'
+        return attributes
+
+    def rewrite(self, html, basepath="/"):
+        # Runs on rendered fragments before basepath rewriting, so src
+        # values are still site-relative.
+        if "<img" not in html:
+            return html
+        return img_pattern.sub(
+            lambda match: match.group(0) + self.attributes(match.group(1), basepath), html
+        )
+
+    def dependencies(self, markdown):
+        return sorted({
+            os.path.join(self.dir_path_static, url.lstrip("/"))
+            for _, url in extract_markdown_images(markdown) if url in self.images
+        })
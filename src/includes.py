@@ -0,0 +1,61 @@
+import os
+import re
+from blocktypes import closes_fence
+
+# A line holding only "{{> file.md }}" is replaced by the lines of that
+# file, resolved against the directory of the file containing the line.
+# Files and directories whose names start with "_" are not pages, so
+# content/_shared/footer.md can hold fragments used by several pages.
+# Lines inside ``` fences are left alone, so a page can show the syntax.
+include_pattern = re.compile(r"[ \t]*\{\{>\s*([^\s}]+)\s*\}\}[ \t]*\n?")
+
+def file_lines(file, keepends):
+    for line in file:
+        if keepends:
+            yield line if line.endswith("\n") else line + "\n"
+        else:
+            yield line[:-1] if line.endswith("\n") else line
+
+def include_lines(lines, from_path, deps, stack=()):
+    # Lines may end with "\n" (read from a file) or not (split from a
+    # string); included lines follow the style of the line they replace.
+    # Every file read is appended to deps.
+    stack = stack + (os.path.normpath(from_path),)
+    # Fences are tracked like scan_blocks does: one opens on the first line
+    # of a block and closes on a line ending with ```.
+    in_fence = False
+    block_start = True
+    for line in lines:
+        stripped = line.strip()
+        if in_fence:
+            in_fence = not closes_fence(stripped)
+            yield line
+            continue
+        if block_start and stripped.startswith("```"):
+            in_fence = not closes_fence(stripped, True)
+            block_start = False
+            yield line
+            continue
+        block_start = not stripped
+        match = include_pattern.fullmatch(line)
+        if match is None:
+            yield line
+            continue
+        path = os.path.join(os.path.dirname(from_path), match.group(1))
+        if os.path.normpath(path) in stack:
+            raise ValueError(f"{from_path}: {match.group(1)} includes itself")
+        try:
+            file = open(path)
+        except FileNotFoundError:
+            raise ValueError(f"{from_path}: include {match.group(1)} not found") from None
+        deps.append(path)
+        with file:
+            yield from include_lines(file_lines(file, line.endswith("\n")), path, deps, stack)
+
+def expand_includes(markdown, from_path):
+    # Returns the markdown with includes inlined and the files they read.
+    if "{{>" not in markdown:
+        return markdown, []
+    deps = []
+    markdown = "\n".join(include_lines(markdown.split("\n"), from_path, deps))
+    return markdown, deps
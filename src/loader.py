@@ -0,0 +1,185 @@
+import json
+import logging
+import mmap
+import os
+import struct
+from manifest import hash_bytes
+
+logger = logging.getLogger(__name__)
+
+MMAP_THRESHOLD = 256 * 1024
+# Sources at least this large are rendered block by block from the file
+# instead of being read into memory whole (see streaming.stream_page).
+STREAM_THRESHOLD = 16 * 1024 * 1024
+BUNDLE_MAGIC = b"SGBUNDLE1\n"
+
+_bundles = {}
+_active = None
+
+def scan_sources(root, suffix=".md"):
+    # One os.scandir pass per directory. is_file/is_dir come from the
+    # directory listing itself, and the stat is kept for later use, so no
+    # separate isfile/isdir/getsize calls are made. The order matches a
+    # sorted, depth-first listing. Names starting with "_" hold includes,
+    # not pages, and are skipped.
+    sources = []
+    with os.scandir(root) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.name.startswith("_"):
+            continue
+        if entry.is_file():
+            if entry.name.endswith(suffix):
+                sources.append((entry.path, entry.stat()))
+        elif entry.is_dir():
+            sources.extend(scan_sources(entry.path, suffix))
+    return sources
+
+def read_bytes(path):
+    # Hashing and bundling need a bytes object, which a plain read gives
+    # with a single copy; slicing a mapping would copy just the same.
+    with open(path, "rb") as file:
+        return file.read()
+
+def decode_source(data):
+    # Same result as reading in text mode: UTF-8 with universal newlines.
+    # data can be any buffer, an open mmap included.
+    text = str(data, "utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+def read_text(path):
+    data = None if _active is None else _active.get(path)
+    if data is not None:
+        return decode_source(data)
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < MMAP_THRESHOLD:
+            return decode_source(file.read())
+        # Large files are decoded straight from the mapping while it is
+        # open, so the text is the only copy made.
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decode_source(mapped)
+
+class ContentBundle():
+    # Every source of a content tree packed into one file: a magic line,
+    # the length of a JSON index, the index ({path: [offset, length,
+    # mtime_ns, size, sha256]}) and the concatenated file contents. An
+    # entry is only used while the file on disk still has the recorded
+    # size and mtime.
+    def __init__(self, root, entries=None, data=b""):
+        self.root = root
+        self.entries = entries or {}
+        self.data = data
+        self.checked = {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        if not data.startswith(BUNDLE_MAGIC):
+            logger.warning(f"Ignoring {path}: not a content bundle")
+            return None
+        start = len(BUNDLE_MAGIC)
+        (index_length,) = struct.unpack(">Q", data[start:start + 8])
+        index = json.loads(data[start + 8:start + 8 + index_length])
+        bundle = cls(index["root"], index["files"])
+        bundle.data = memoryview(data)[start + 8 + index_length:]
+        return bundle
+
+    def validate(self, sources):
+        # Marks entries fresh or stale from stats already collected by
+        # scan_sources, so get() needs no further system calls.
+        for path, stat in sources:
+            entry = self.entries.get(path)
+            self.checked[path] = entry is not None and entry[2:4] == [stat.st_mtime_ns, stat.st_size]
+
+    def is_fresh(self, path):
+        fresh = self.checked.get(path)
+        if fresh is None:
+            entry = self.entries.get(path)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stat = None
+            fresh = (entry is not None and stat is not None
+                     and entry[2:4] == [stat.st_mtime_ns, stat.st_size])
+            self.checked[path] = fresh
+        return fresh
+
+    def get(self, path):
+        if not self.is_fresh(path):
+            return None
+        offset, length = self.entries[path][:2]
+        return bytes(self.data[offset:offset + length])
+
+    def hashes(self):
+        return {path: entry[4] for path, entry in self.entries.items() if self.is_fresh(path)}
+
+    def stale(self, sources):
+        paths = {path for path, stat in sources if stat.st_size < STREAM_THRESHOLD}
+        return paths != set(self.entries) or not all(self.is_fresh(path) for path in paths)
+
+def write_bundle(path, root, sources, bundle=None):
+    # Fresh entries are copied from the previous bundle; everything else is
+    # read from disk. Sources big enough to be streamed are left out.
+    entries = {}
+    chunks = []
+    offset = 0
+    for source, stat in sources:
+        if stat.st_size >= STREAM_THRESHOLD:
+            continue
+        data = bundle.get(source) if bundle is not None else None
+        if data is None:
+            data = read_bytes(source)
+        entries[source] = [offset, len(data), stat.st_mtime_ns, stat.st_size, hash_bytes(data)]
+        chunks.append(data)
+        offset += len(data)
+    index = json.dumps({"root": root, "files": entries}, separators=(",", ":")).encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(BUNDLE_MAGIC)
+        file.write(struct.pack(">Q", len(index)))
+        file.write(index)
+        for chunk in chunks:
+            file.write(chunk)
+    os.replace(tmp_path, path)
+    logger.info(f"Bundled {len(entries)} sources ({offset} bytes) into {path}")
+
+def load_bundle(path, root=None):
+    bundle = ContentBundle.load(path)
+    if bundle is not None and root is not None and bundle.root != root:
+        return None
+    return bundle
+
+def get_bundle(path):
+    # One bundle per process, loaded on first use; worker processes call
+    # this instead of receiving the bundle's bytes from the parent.
+    if path is None:
+        return None
+    if path not in _bundles:
+        _bundles[path] = load_bundle(path)
+    return _bundles[path]
+
+def activate(bundle):
+    global _active
+    _active = bundle
+
+def active():
+    return _active
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    rel_dir, filename = os.path.split(os.path.relpath(from_path, dir_path_content))
+    return os.path.join(dest_dir_path, rel_dir, filename.replace(".md", ".html"))
+
+def find_pages(dir_path_content, dest_dir_path, sources=None):
+    if sources is None:
+        sources = scan_sources(dir_path_content)
+    return [
+        (from_path, page_dest_path(from_path, dir_path_content, dest_dir_path))
+        for from_path, _ in sources
+    ]
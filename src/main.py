@@ -1,27 +1,697 @@
+import argparse
+import json
+import logging
 import os
+import re
 import shutil
 import sys
-from copystatic import copy_files
-from markdown_blocks import generate_pages_recursive
 
-dir_path_static = "./static"
-dir_path_public = "./docs"
-dir_path_content = "./content"
-template_path = "./template.html"
+logger = logging.getLogger("sitegen")
 
-def main():
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+COMMANDS = ("build", "serve", "watch", "bench", "clean", "deps")
+CONFIG_PATH = "./sitegen.json"
+DEFAULT_PORT = 8888
+
+# Everything beyond argparse is imported inside the command (or the part
+# of a build) that needs it, so a small build does not pay for the dev
+# server, process pools, feeds or image decoding it never uses.
+
+class OptionParser(argparse.ArgumentParser):
+    # Records each option by dest as it is added, so config file keys can
+    # be matched to them.
+    def __init__(self, *args, **kwargs):
+        self.options = {}
+        super().__init__(*args, **kwargs)
+
+    def add_argument(self, *args, **kwargs):
+        action = super().add_argument(*args, **kwargs)
+        self.options[action.dest] = action
+        return action
+
+def parse_target(value):
+    # "BASEPATH=DIR", optionally followed by ",overlay=DIR".
+    spec, *options = value.split(",")
+    basepath, separator, output = spec.partition("=")
+    if not separator or not basepath or not output:
+        raise argparse.ArgumentTypeError(f"expected BASEPATH=DIR[,overlay=DIR], got {value!r}")
+    target = {"basepath": basepath, "output": output}
+    for option in options:
+        key, separator, option_value = option.partition("=")
+        if key != "overlay" or not option_value:
+            raise argparse.ArgumentTypeError(f"unknown target option {option!r} in {value!r}")
+        target["overlay"] = option_value
+    return target
+
+def config_target(value):
+    # Targets in a config file are strings in the command-line form or
+    # objects with "basepath", "output" and optionally "overlay" keys.
+    if isinstance(value, str):
+        return parse_target(value)
+    target = parse_target(f"{value.get('basepath', '')}={value.get('output', '')}")
+    if value.get("overlay"):
+        target["overlay"] = value["overlay"]
+    return target
+
+def parse_widths(value):
+    return tuple(int(width) for width in value.split(","))
+
+def add_path_arguments(parser):
+    parser.add_argument("--config", metavar="PATH",
+                        help=f"read option defaults from this JSON file (default {CONFIG_PATH} if it exists)")
+    parser.add_argument("--content", default="./content", metavar="DIR", help="markdown sources")
+    parser.add_argument("--static", default="./static", metavar="DIR", help="static files copied as-is")
+    parser.add_argument("--output", default="./docs", metavar="DIR", help="where the site is written")
+    parser.add_argument("--template", default="./template.html", metavar="PATH",
+                        help="template used by pages without a template metadata line")
+    parser.add_argument("--cache-dir", default="./.cache", metavar="DIR",
+                        help="manifests, caches and other state kept between builds")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every file")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+
+def add_build_arguments(parser):
+    from copystatic import LINK_MODES
+
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--target",
+        action="append",
+        default=[],
+        type=parse_target,
+        metavar="BASEPATH=DIR[,overlay=DIR]",
+        help="also build the site for this basepath into DIR; pages are parsed once for all "
+             "targets. An overlay is a content directory whose pages replace the shared ones",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-render pages whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help="read sources from a single bundle file in the cache directory and refresh it after the build",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete the output directory before building",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip comments and collapse whitespace in generated HTML",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="render pages with N worker processes (0 uses every core)",
+    )
+    parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help="reuse rendered HTML of identical markdown blocks across pages and builds",
+    )
+    parser.add_argument(
+        "--link-mode",
+        choices=LINK_MODES,
+        default="auto",
+        help="how static files are placed; auto tries a reflink, then copies",
+    )
+    parser.add_argument(
+        "--static-hash",
+        action="store_true",
+        help="compare content hashes of static files whose mtime differs",
+    )
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="skip static files matching this glob (in addition to the defaults)",
+    )
+    parser.add_argument(
+        "--copy-workers",
+        type=int,
+        default=8,
+        metavar="N",
+        help="number of threads used to copy static files",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading, rendering and writing pages using I/O thread pools",
+    )
+    parser.add_argument(
+        "--io-workers",
+        type=int,
+        default=4,
+        metavar="N",
+        help="reader and writer threads used by --pipeline",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="report broken internal links and images, and pages nothing links to",
+    )
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="write sitemap.xml and an Atom feed.xml with absolute links under this URL",
+    )
+    parser.add_argument(
+        "--feed-section",
+        default="blog",
+        metavar="DIR",
+        help="content directory whose pages are listed in feed.xml",
+    )
+    parser.add_argument(
+        "--feed-author",
+        metavar="NAME",
+        help="feed.xml author for pages without an author metadata line",
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        help="write a gzipped search index (term -> pages) to search.json.gz",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write a gzipped .gz sibling next to each HTML, CSS, JS and other text output",
+    )
+    parser.add_argument(
+        "--compress-min-size",
+        type=int,
+        metavar="BYTES",
+        help="outputs smaller than this are not compressed (default 1024)",
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help="add width, height and loading=\"lazy\" to images, read from the PNG files",
+    )
+    parser.add_argument(
+        "--image-variants",
+        action="store_true",
+        help="also write downscaled PNG variants and reference them with srcset (implies --images)",
+    )
+    parser.add_argument(
+        "--image-widths",
+        type=parse_widths,
+        metavar="W,W,...",
+        help="widths of the variants written by --image-variants (default 480,960)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="time each build stage and page and write a JSON report (default profile.json in the cache directory)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages listed in the profile",
+    )
+
+def make_parser():
+    parser = OptionParser(prog="sitegen", description="Generate the static site.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    build_parser = commands.add_parser("build", help="build the site (the default command)")
+    add_build_arguments(build_parser)
+    watch_parser = commands.add_parser("watch", help="build, then rebuild pages as their inputs change")
+    add_build_arguments(watch_parser)
+    watch_parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.1,
+        metavar="SECONDS",
+        help="how often to poll for changes",
+    )
+    serve_parser = commands.add_parser(
+        "serve", help="serve pages rendered on demand from the content directory"
+    )
+    serve_parser.add_argument("basepath", nargs="?", default="/")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help="reuse rendered HTML of identical markdown blocks across requests and runs",
+    )
+    clean_parser = commands.add_parser("clean", help="delete the output directories and the cache")
+    clean_parser.add_argument(
+        "--keep-cache",
+        action="store_true",
+        help="only delete the output directories",
+    )
+    clean_parser.add_argument("--target", action="append", default=[], type=parse_target,
+                              metavar="BASEPATH=DIR", help="also delete this target's output")
+    deps_parser = commands.add_parser(
+        "deps", help="show what re-renders when files change, from the last build's manifests"
+    )
+    deps_parser.add_argument("paths", nargs="*", metavar="PATH",
+                             help="list the pages rendered from any of these files")
+    deps_parser.add_argument("--of", action="append", default=[], metavar="PAGE",
+                             help="list the files this page source was rendered from")
+    deps_parser.add_argument("--changed", action="store_true",
+                             help="list the pages whose inputs changed since the last build")
+    deps_parser.add_argument("--target", action="append", default=[], type=parse_target,
+                             metavar="BASEPATH=DIR[,overlay=DIR]",
+                             help="also read this target's manifest")
+    # Listed for --help only; "bench" arguments are handed to bench.py as-is.
+    commands.add_parser("bench", help="benchmark the generator on a synthetic corpus", add_help=False)
+    for name, subparser in commands.choices.items():
+        if name != "bench":
+            add_path_arguments(subparser)
+    return parser, commands.choices
+
+def normalize_argv(argv):
+    # Earlier versions took only "[basepath] [options]", with --serve and
+    # --watch as flags. Such command lines still work: without a command
+    # name, "build" is assumed and the old flags pick the command.
+    if argv and (argv[0] in COMMANDS or argv[0] in ("-h", "--help")):
+        return argv
+    if "--serve" in argv:
+        return ["serve"] + [arg for arg in argv if arg != "--serve"]
+    if "--watch" in argv:
+        return ["watch"] + [arg for arg in argv if arg != "--watch"]
+    return ["build"] + argv
+
+def load_config(path, required):
+    # A JSON object of option defaults, keyed by option name ("jobs",
+    # "site-url", "targets", ...). Command-line options still win.
+    if not os.path.exists(path):
+        if required:
+            raise SystemExit(f"sitegen: config file {path} not found")
+        return {}
+    with open(path) as file:
+        try:
+            config = json.load(file)
+        except ValueError as e:
+            raise SystemExit(f"sitegen: invalid config file {path}: {e}")
+    if not isinstance(config, dict):
+        raise SystemExit(f"sitegen: config file {path} must hold a JSON object")
+    return {key.replace("-", "_"): value for key, value in config.items()}
+
+def apply_config(parser, config, shared=()):
+    # Values are checked and converted the same way as on the command line.
+    # One config file serves every command, so keys in `shared`, the
+    # options of the other commands, are skipped; any other key this
+    # command does not know is an error.
+    unknown = set(config) - set(parser.options) - set(shared) - {"targets", "help", "config"}
+    if unknown:
+        parser.error(f"unknown option in config: {', '.join(sorted(unknown))}")
+    defaults = {}
+    for key, value in config.items():
+        if key == "targets":
+            key = "target"
+        action = parser.options.get(key)
+        if action is None or key in ("help", "config"):
+            continue
+        if key == "target":
+            value = [config_target(target) for target in value]
+        elif key == "image_widths" and not isinstance(value, str):
+            value = tuple(value)
+        elif action.type is not None and isinstance(value, str):
+            value = action.type(value)
+        if action.choices is not None and value not in action.choices:
+            parser.error(f"invalid {key} in config: {value!r}")
+        defaults[key] = value
+    parser.set_defaults(**defaults)
+
+def parse_args(argv=None):
+    argv = normalize_argv(list(sys.argv[1:] if argv is None else argv))
+    parser, subparsers = make_parser()
+    if argv[0] in subparsers and argv[0] != "bench":
+        config_parser = argparse.ArgumentParser(add_help=False)
+        config_parser.add_argument("--config")
+        config_args, _ = config_parser.parse_known_args(argv[1:])
+        config = load_config(config_args.config or CONFIG_PATH, config_args.config is not None)
+        shared = {key for subparser in subparsers.values() for key in subparser.options}
+        apply_config(subparsers[argv[0]], config, shared)
+    return parser.parse_args(argv)
+
+def target_state_dir(cache_dir, output, primary):
+    # Manifests and other state that describe one output tree. The main
+    # target keeps them at the top of the cache so existing caches stay
+    # valid; extra targets get a directory named after their output.
+    if primary:
+        return cache_dir
+    name = re.sub(r"[^\w.-]+", "_", os.path.normpath(output)).strip("_.") or "root"
+    return os.path.join(cache_dir, "targets", name)
+
+def build_targets(args):
+    targets = [{"basepath": args.basepath, "output": args.output}] + list(args.target)
+    outputs = set()
+    for i, target in enumerate(targets):
+        output = os.path.normpath(target["output"])
+        if output in outputs:
+            raise SystemExit(f"sitegen: {target['output']} is the output of more than one target")
+        outputs.add(output)
+        target["state"] = target_state_dir(args.cache_dir, target["output"], i == 0)
+    return targets
+
+def check_links(site_index, dir_path_static):
+    from siteindex import LinkGraph
+
+    graph = LinkGraph(site_index, dir_path_static)
+    for source, target in graph.broken:
+        logger.warning(f"Broken link in {source}: {target}")
+    orphans = graph.orphans()
+    for source in orphans:
+        logger.warning(f"No page links to {source}")
+    logger.info(f"Checked links: {len(graph.broken)} broken, {len(orphans)} orphaned pages")
+
+def update_search_index(site_index, results, target, incremental):
+    from markdown_blocks import page_text
+    from search import SearchIndex, load_search_index, page_terms, save_search_index, write_search_index
+    from siteindex import page_digests, page_href
+
+    state_path = os.path.join(target["state"], "search.json")
+    index = load_search_index(state_path) if incremental else SearchIndex()
+    index.retain(site_index["pages"])
+    for result in results:
+        entry = site_index["pages"][result["source"]]
+        href = page_href(result["source"], entry["url"])
+        index.add_page(result["source"], href, result["title"], result["terms"],
+                       page_digests(result["source"], entry))
+    # Pages skipped by this build that the index has not seen, or last saw
+    # with different text (edited in a build without --search-index, or by
+    # watch mode, which does not update the index).
+    for source, entry in site_index["pages"].items():
+        digests = page_digests(source, entry)
+        if not index.is_current(source, digests):
+            href = page_href(source, entry["url"])
+            index.add_page(source, href, entry["title"], page_terms(page_text(source)), digests)
+    save_search_index(state_path, index)
+    write_search_index(os.path.join(target["output"], "search.json.gz"), index, target["basepath"])
+
+def sync_static(args, target):
+    from copystatic import DEFAULT_IGNORE, sync_files
+    from profiling import stage
+
+    if args.clean and os.path.exists(target["output"]):
+        shutil.rmtree(target["output"])
+    os.makedirs(target["output"], exist_ok=True)
+    logger.info(f"Copying static files to {target['output']}...")
+    sync_options = {
+        "manifest_path": os.path.join(target["state"], "static.json"),
+        "ignore": DEFAULT_IGNORE + tuple(args.ignore),
+        "use_hash": args.static_hash,
+        "link_mode": args.link_mode,
+        "workers": args.copy_workers,
+    }
+    with stage("static copy"):
+        stats = sync_files(args.static, target["output"], **sync_options)
+    logger.info(
+        f"Copied {stats['copied']} static files ({stats['bytes']} bytes) in "
+        f"{stats['seconds']:.2f}s, {stats['unchanged']} unchanged, {stats['removed']} removed"
+    )
+    return sync_options
+
+def refresh_images(args, target, sync_options):
+    if not (args.images or args.image_variants):
+        return None
+    from images import DEFAULT_WIDTHS, ImageCatalog
+    from profiling import stage
+
+    widths = args.image_widths or DEFAULT_WIDTHS
+    images = ImageCatalog(
+        args.static,
+        target["output"],
+        target["state"],
+        widths if args.image_variants else (),
+        sync_options["ignore"],
+        # Variants depend only on the image bytes, so every target shares them.
+        os.path.join(args.cache_dir, "variants"),
+    )
+    with stage("images"):
+        stats = images.refresh()
+    logger.info(
+        f"Processed {stats['processed']} images in {stats['seconds']:.2f}s, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} variants removed"
+    )
+    return images
+
+def plan_target(args, target, hashes, images):
+    from manifest import load_manifest, plan_build, remove_outputs
+
+    # Without --incremental every page is rendered, but only pages whose
+    # HTML changed are rewritten and pages removed since the last build
+    # are still cleaned up.
+    target["to_render"], stale, target["manifest"] = plan_build(
+        target["pages"],
+        target["basepath"],
+        load_manifest(os.path.join(target["state"], "manifest.json")),
+        hashes,
+        settings={"minify": args.minify, "images": None if images is None else list(images.widths)},
+        force=not args.incremental,
+    )
+    remove_outputs(stale, target["output"])
+
+def render_targets(args, targets, images, bundle_path):
+    # Every page is parsed once, however many targets render it.
+    from targets import group_outputs, split_results
+
+    items = group_outputs(targets)
+    block_cache_path = os.path.join(args.cache_dir, "blocks") if args.block_cache else None
+    if not items:
+        results = []
+    elif args.pipeline:
+        from blockcache import get_block_cache
+        from pipeline import generate_outputs_pipelined
+
+        results = generate_outputs_pipelined(
+            items,
+            args.template,
+            readers=args.io_workers,
+            writers=args.io_workers,
+            block_cache=get_block_cache(block_cache_path),
+            index_text=args.search_index,
+            minify=args.minify,
+            images=images,
+        )
+    else:
+        from parallel import generate_outputs_parallel
+
+        results = generate_outputs_parallel(
+            items,
+            args.template,
+            args.jobs,
+            block_cache_path=block_cache_path,
+            index_text=args.search_index,
+            minify=args.minify,
+            images=images,
+            bundle_path=bundle_path,
+        )
+    split_results(results, targets)
+
+def record_target(target, hashes):
+    from manifest import record_page, save_manifest
+
+    for result in target["results"]:
+        record_page(target["manifest"], result["source"], result["dest"], result["deps"], hashes)
+    save_manifest(os.path.join(target["state"], "manifest.json"), target["manifest"])
+    written = sum(1 for result in target["results"] if result["written"])
+    logger.info(
+        f"Rendered {len(target['to_render'])} of {len(target['pages'])} pages for "
+        f"{target['basepath']}, {written} changed"
+    )
+
+def finish_target(args, target):
+    if args.search_index:
+        update_search_index(target["index"], target["results"], target, args.incremental)
+    if args.site_url:
+        from feeds import write_site_files
+
+        write_site_files(
+            target["index"], target["output"], args.site_url, target["basepath"], args.feed_section,
+            args.feed_author,
+        )
+    # Outputs were compressed as they were written; this pass only catches
+    # up on the ones nothing rewrote. A build without --compress leaves
+    # siblings stale, so the next one with it has to check them all.
+    state_path = os.path.join(target["state"], "compressed.json")
+    if args.compress:
+        import compress
+        from profiling import stage
+
+        with stage("compress"):
+            stats = compress.compress_outputs(target["output"], state_path, *compress.settings)
+        logger.info(
+            f"Compressed {stats['compressed']} outputs nothing rewrote in {stats['seconds']:.2f}s, "
+            f"{stats['unchanged']} unchanged, {stats['removed']} removed"
+        )
+    elif os.path.exists(state_path):
+        os.remove(state_path)
+
+def build(args):
+    import compress
+    import profiling
+    from loader import activate, find_pages, load_bundle, scan_sources, write_bundle
+    from profiling import format_report, stage
+    from siteindex import build_site_index, load_site_index, save_site_index
+
+    targets = build_targets(args)
+    if args.command == "watch" and len(targets) > 1:
+        raise SystemExit("sitegen: watch supports a single target")
+    profile_path = args.profile or os.path.join(args.cache_dir, "profile.json")
+    profiler = profiling.enable() if args.profile is not None else None
+    if args.compress:
+        min_size = compress.MIN_SIZE if args.compress_min_size is None else args.compress_min_size
+        compress.activate((min_size, compress.LEVEL))
+    sync_options = [sync_static(args, target) for target in targets]
+    catalogs = [refresh_images(args, target, options) for target, options in zip(targets, sync_options)]
+
+    logger.info("Generating HTML pages...")
+    # Sources are scanned, hashed and indexed once; every target reuses them.
+    hashes = {}
+    bundle_path = os.path.join(args.cache_dir, "content.bundle")
+    site_index_path = os.path.join(args.cache_dir, "site_index.json")
+    bundle = load_bundle(bundle_path, args.content) if args.bundle else None
+    with stage("discovery"):
+        sources = scan_sources(args.content)
+        if bundle is not None:
+            # Sources unchanged since the bundle was written are read and
+            # hashed from it instead of from disk.
+            bundle.validate(sources)
+            hashes.update(bundle.hashes())
+            activate(bundle)
+        for target in targets:
+            target["pages"] = find_pages(args.content, target["output"], sources)
+        site_index = build_site_index(
+            targets[0]["pages"], args.content, load_site_index(site_index_path), hashes
+        )
+        for target in targets:
+            target["index"] = site_index
+            if target.get("overlay"):
+                from targets import overlay_pages, overlay_site_index
+
+                target["pages"], overlay = overlay_pages(
+                    target["pages"], target["overlay"], target["output"]
+                )
+                target["index"] = overlay_site_index(
+                    site_index, overlay, target["overlay"], hashes,
+                    os.path.join(target["state"], "overlay_index.json"),
+                )
+    save_site_index(site_index_path, site_index)
+    if args.check_links:
+        check_links(site_index, args.static)
+    # Image attributes only depend on the static files, so the first
+    # target's catalog serves every target.
+    for target, images in zip(targets, catalogs):
+        plan_target(args, target, hashes, images)
+    render_targets(args, targets, catalogs[0], bundle_path if bundle is not None else None)
+    for target in targets:
+        record_target(target, hashes)
+        finish_target(args, target)
+    if args.bundle and (bundle is None or bundle.stale(sources)):
+        write_bundle(bundle_path, args.content, sources, bundle)
+    # Watch mode must see edits, so later reads go to disk. It keeps
+    # compressing what it writes.
+    activate(None)
+    if args.command != "watch":
+        compress.activate(None)
+    if args.block_cache:
+        from blockcache import BlockCache
+
+        BlockCache(os.path.join(args.cache_dir, "blocks")).prune()
+    if profiler is not None:
+        report = profiler.write_report(profile_path, args.profile_top)
+        logger.info(format_report(report))
+        logger.info(f"Profile written to {profile_path}")
+        profiling.disable()
+
+    if args.command == "watch":
+        from blockcache import get_block_cache
+        from watch import Watcher
+
+        target = targets[0]
+        watcher = Watcher(
+            args.content,
+            args.static,
+            args.template,
+            target["output"],
+            target["basepath"],
+            target["manifest"],
+            os.path.join(target["state"], "manifest.json"),
+            sync_options[0],
+            get_block_cache(os.path.join(args.cache_dir, "blocks") if args.block_cache else None),
+            args.minify,
+            catalogs[0],
+        )
+        watcher.run(args.watch_interval)
+
+def serve(args):
+    from blockcache import get_block_cache
+    from server import serve
+
+    serve(
+        args.content,
+        args.static,
+        args.template,
+        args.port,
+        basepath=args.basepath,
+        block_cache=get_block_cache(os.path.join(args.cache_dir, "blocks") if args.block_cache else None),
+    )
+
+def clean(args):
+    paths = [args.output] + [target["output"] for target in args.target]
+    if not args.keep_cache:
+        paths.append(args.cache_dir)
+    for path in paths:
+        if os.path.isdir(path):
+            logger.info(f"Removing {path}")
+            shutil.rmtree(path)
+
+def show_deps(args):
+    from depgraph import load_graph
+
+    outputs = [args.output] + [target["output"] for target in args.target]
+    graph = load_graph(
+        os.path.join(target_state_dir(args.cache_dir, output, i == 0), "manifest.json")
+        for i, output in enumerate(outputs)
+    )
+    if not graph.deps:
+        raise SystemExit(f"sitegen: no build manifest in {args.cache_dir}; run a build first")
+
+    def show_pages(sources):
+        for source in sources:
+            print(f"{os.path.relpath(source)} -> {', '.join(graph.outputs[source])}")
+
+    for source in args.of:
+        for path in graph.dependencies(source):
+            print(os.path.relpath(path))
+    if args.paths:
+        show_pages(graph.dependents(args.paths))
+    if args.changed:
+        sources, paths = graph.changed()
+        for path in paths:
+            print(f"changed: {os.path.relpath(path)}")
+        show_pages(sources)
+
+def main(argv=None):
+    argv = normalize_argv(list(sys.argv[1:] if argv is None else argv))
+    if argv[0] == "bench":
+        import bench
+
+        return bench.main(argv[1:])
+    args = parse_args(argv)
+    level = logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO
+    logging.basicConfig(level=level, format="%(message)s")
+    if args.command == "serve":
+        serve(args)
+    elif args.command == "clean":
+        clean(args)
+    elif args.command == "deps":
+        show_deps(args)
     else:
-        basepath = "/"
-    if os.path.exists(dir_path_public):
-        shutil.rmtree(dir_path_public)
-    os.makedirs(dir_path_public)
-
-    print("Copying static files to public directory...")
-    copy_files(dir_path_static, dir_path_public)
-    
-    print("Generating HTML pages...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
-
-main()
\ No newline at end of file
+        build(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
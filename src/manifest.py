@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import os
+from blocktypes import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+# A different version re-renders every page and empties the block cache.
+GENERATOR_VERSION = f"1.{PARSER_VERSION}"
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def new_manifest(basepath, settings=None):
+    return {"version": GENERATOR_VERSION, "basepath": basepath, "settings": settings or {}, "pages": {}}
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def current_hash(path, hashes):
+    if path not in hashes:
+        try:
+            hashes[path] = hash_file(path)
+        except FileNotFoundError:
+            hashes[path] = None
+    return hashes[path]
+
+def deps_unchanged(deps, hashes):
+    if not deps:
+        return False
+    for path, digest in deps.items():
+        if current_hash(path, hashes) != digest:
+            return False
+    return True
+
+def plan_build(pages, basepath, manifest, hashes=None, settings=None, force=False):
+    # A page is re-rendered when any input recorded for it on its last
+    # render (source, template, ...) has changed. A different generator
+    # version, basepath or output settings invalidates every page, as does
+    # force; stale outputs are still found from the old manifest.
+    if hashes is None:
+        hashes = {}
+    old_pages = {} if manifest is None else manifest.get("pages", {})
+    rebuild_all = (
+        manifest is None
+        or manifest.get("version") != GENERATOR_VERSION
+        or manifest.get("basepath") != basepath
+        or manifest.get("settings", {}) != (settings or {})
+        or force
+    )
+    new = new_manifest(basepath, settings)
+    to_render = []
+    for from_path, dest_path in pages:
+        old = old_pages.get(from_path)
+        if (not rebuild_all and old is not None and old["dest"] == dest_path
+                and os.path.exists(dest_path) and deps_unchanged(old["deps"], hashes)):
+            new["pages"][from_path] = old
+        else:
+            to_render.append((from_path, dest_path))
+    current_dests = {dest_path for _, dest_path in pages}
+    stale = sorted(
+        entry["dest"] for entry in old_pages.values()
+        if entry["dest"] not in current_dests
+    )
+    return to_render, stale, new
+
+def record_page(manifest, from_path, dest_path, deps, hashes=None):
+    if hashes is None:
+        hashes = {}
+    manifest["pages"][from_path] = {
+        "dest": dest_path,
+        "deps": {path: current_hash(path, hashes) for path in deps},
+    }
+
+def remove_outputs(paths, root):
+    # Only paths under root are touched, so a manifest left by a build into
+    # another output directory never deletes files there.
+    root = os.path.abspath(root)
+    for path in paths:
+        if not os.path.abspath(path).startswith(root + os.sep):
+            continue
+        if os.path.exists(path):
+            logger.info(" * removing stale output %s", path)
+            os.remove(path)
+        if os.path.exists(path + ".gz"):
+            os.remove(path + ".gz")
+        parent = os.path.dirname(os.path.abspath(path))
+        while (parent.startswith(root + os.sep) and os.path.isdir(parent)
+                and not os.listdir(parent)):
+            os.rmdir(parent)
+            parent = os.path.dirname(parent)
@@ -1,125 +1,29 @@
-from enum import Enum
+import logging
 import os
 import shutil
-from utility import markdown_to_blocks, split_nodes_delimiter, text_to_textnodes
-from htmlnode import HTMLNode, ParentNode, LeafNode
-from textnode import TextType, TextNode, text_node_to_html_node
-
-class BlockType(Enum):
-    PARAGRAPH = "paragraph"
-    HEADING = "heading"
-    CODE = "code"
-    QUOTE = "quote"
-    ULIST = "unordered_list"
-    OLIST = "ordered_list"
-
-def block_to_block_type(block):
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
-    if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
-    if block.startswith(">"):
-        split_block = block.split("\n")
-        for line in split_block:
-            if line[0] != ">":
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if block.startswith("- "):
-        split_block = block.split("\n")
-        for line in split_block:
-            if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.ULIST
-    if block.startswith("1. "):
-        split_block = block.split("\n")
-        counter = 1
-        for line in split_block:
-            if not line.startswith(f"{counter}. "):
-                return BlockType.PARAGRAPH
-            counter += 1
-        return BlockType.OLIST
-    return BlockType.PARAGRAPH
-
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    
-    html_nodes = []
-    for node in text_nodes:
-        html_node = text_node_to_html_node(node)
-        html_nodes.append(html_node)
-    
-    return html_nodes
-
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    parent_node = ParentNode("div", [], None)
-    if not blocks:
-        return parent_node
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.PARAGRAPH:
-                normalized_paragraph = block.replace("\n", " ").strip()
-                children = text_to_children(normalized_paragraph)
-                p_node = ParentNode("p", children, None)
-                parent_node.children.append(p_node)
-            case BlockType.HEADING:
-                level = 0
-                for char in block:
-                    if char == '#':
-                        level += 1
-                    else:
-                        break
-                heading_text = block[level+1:] if level < len(block) else ""
-                children = text_to_children(heading_text)
-                if 1 <= level <= 6:
-                    h_node = ParentNode(f"h{level}", children, None)
-                    parent_node.children.append(h_node)
-            case BlockType.CODE:
-                lines = block.split("\n")
-                if len(lines) >= 3:
-                    code_content = "\n".join(lines[1:-1]) + "\n"
-                else:
-                    code_content = ""
-                text_node = TextNode(code_content, TextType.CODE)
-                code_node = text_node_to_html_node(text_node)
-                pre_node = ParentNode("pre", [code_node], None)
-                parent_node.children.append(pre_node)
-            case BlockType.QUOTE:
-                lines = block.split("\n")
-                processed_lines = []
-                for line in lines:
-                    if line.startswith("> "):
-                        processed_lines.append(line[2:])
-                    else:
-                        processed_lines.append(line)
-                quote_text = " ".join(processed_lines)
-                children = text_to_children(quote_text)
-                blockquote_node = ParentNode("blockquote", children, None)
-                parent_node.children.append(blockquote_node)
-            case BlockType.ULIST:
-                lines = block.split("\n")
-                children = []
-                for line in lines:
-                    if len(line) <= 2:
-                        continue
-                    processed_line = text_to_children(line[2:].strip())
-                    li_node = ParentNode("li", processed_line, None)
-                    children.append(li_node)
-                ul_node = ParentNode("ul", children, None)
-                parent_node.children.append(ul_node)
-            case BlockType.OLIST:
-                lines = block.split("\n")
-                children = []
-                for line in lines:
-                    if len(line) <= 3:
-                        continue
-                    processed_line = text_to_children(line[3:].strip())
-                    li_node = ParentNode("li", processed_line, None)
-                    children.append(li_node)
-                ol_node = ParentNode("ol", children, None)
-                parent_node.children.append(ol_node)
-    return parent_node
+import time
+import profiling
+from utility import markdown_to_blocks, split_nodes_delimiter
+from blocktypes import BlockType, block_to_block_type, scan_blocks
+from flatdoc import block_document, markdown_to_flat_document
+from htmlnode import HTMLNode, LeafNode
+from includes import expand_includes, include_lines
+from loader import STREAM_THRESHOLD, find_pages, read_text
+from output import minify_html, replace_if_changed
+from profiling import stage
+from streaming import body_lines, stream_page
+from search import page_terms
+from templates import load_template, resolve_template_path, rewrite_basepath, split_page_metadata
+
+logger = logging.getLogger(__name__)
+
+def markdown_to_html_node(markdown, block_cache=None):
+    # Pages are rendered through the flat document; the node tree is built
+    # from it for callers that want HTMLNode objects.
+    return markdown_to_flat_document(markdown, block_cache).to_node()
+
+def block_to_html_node(block):
+    return block_document(block).to_node()
 
 def extract_title(markdown):
     split_markdown = markdown.split("\n")
@@ -128,29 +32,167 @@ def extract_title(markdown):
             return line[2:].strip()
     raise Exception("The header must start with a single #")
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def prepare_page(from_path, template_path, basepath, block_cache=None, images=None):
+    with stage("read"):
+        markdown = read_text(from_path)
+    return prepare_markdown(markdown, from_path, template_path, basepath, block_cache, images)
+
+def prepare_markdown(markdown, from_path, template_path, basepath, block_cache=None, images=None):
+    template_path, values, deps, content_node = parse_markdown(
+        markdown, from_path, template_path, block_cache, images
+    )
+    template, values = bind_page(template_path, values, content_node.iter_html, basepath, images)
+    return template, values, deps, content_node
+
+def parse_markdown(markdown, from_path, template_path, block_cache=None, images=None):
+    # Everything about a page that does not depend on the basepath, so one
+    # parse can be bound to several deployment targets.
+    metadata, markdown = split_page_metadata(markdown)
+    markdown, includes = expand_includes(markdown, from_path)
+    template_path = resolve_template_path(template_path, metadata)
+    with stage("template"):
+        partials = load_template(template_path).deps
+    content_node = markdown_to_flat_document(markdown, block_cache)
+    values = dict(metadata)
+    values["Title"] = extract_title(markdown)
+    # Everything the page was rendered from; a change to any of these
+    # files re-renders it.
+    deps = [from_path, template_path] + partials + includes
+    if images is not None:
+        deps.extend(images.dependencies(markdown))
+    return template_path, values, deps, content_node
+
+def bind_page(template_path, values, fragments, basepath, images=None):
+    # fragments is a callable returning the page's HTML fragments.
+    with stage("template"):
+        template = load_template(template_path, basepath)
+    values = dict(values)
+    values["Basepath"] = basepath
+    if images is None:
+        values["Content"] = lambda: (
+            rewrite_basepath(fragment, basepath) for fragment in fragments()
+        )
+    else:
+        values["Content"] = lambda: (
+            rewrite_basepath(images.rewrite(fragment, basepath), basepath)
+            for fragment in fragments()
+        )
+    return template, values
+
+def page_text(from_path):
+    # Block by block, so indexing a huge page does not load it whole.
     with open(from_path) as file:
-        markdown = file.read()
-    with open(template_path) as file:
-        template = file.read()
-    html_content = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown)
-    revised_template = template.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
-    revised_template = revised_template.replace('href="/', f'href="{basepath}')
-    revised_template = revised_template.replace('src="/', f'src="{basepath}')
-    if not os.path.exists(dest_path):
-        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, 'w') as file:
-        file.write(revised_template)
+        _, lines = body_lines(file)
+        lines = include_lines(lines, from_path, [])
+        return " ".join(block_document(block).text() for block in scan_blocks(lines))
+
+def render_page(from_path, template_path, basepath, block_cache=None):
+    template, values, deps, _ = prepare_page(from_path, template_path, basepath, block_cache)
+    return template.render(values), deps
+
+def generate_page(from_path, template_path, dest_path, basepath, block_cache=None,
+                  index_text=False, minify=False, images=None, stream_threshold=STREAM_THRESHOLD):
+    return generate_page_outputs(
+        from_path, template_path, [(dest_path, basepath)], block_cache, index_text, minify,
+        images, stream_threshold,
+    )[0]
+
+def generate_page_outputs(from_path, template_path, outputs, block_cache=None, index_text=False,
+                          minify=False, images=None, stream_threshold=STREAM_THRESHOLD):
+    # Parses the page once and writes it to every (dest_path, basepath) in
+    # outputs; only binding the basepath, templating and writing are
+    # repeated per output. Returns one result per output.
+    start = time.perf_counter()
+    if os.path.getsize(from_path) >= stream_threshold:
+        # Huge pages are streamed to all outputs at once, in one pass.
+        for dest_path, _ in outputs:
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        results = stream_page(from_path, template_path, outputs, index_text, minify, images)
+        profiler = profiling.active()
+        if profiler is not None:
+            profiler.add_page(from_path, time.perf_counter() - start)
+        return results
+    with stage("read"):
+        markdown = read_text(from_path)
+    results = []
+    for result, template, values in bind_outputs(
+        markdown, from_path, template_path, outputs, block_cache, index_text, images
+    ):
+        if not os.path.exists(result["dest"]):
+            os.makedirs(os.path.dirname(result["dest"]), exist_ok=True)
+        result["written"] = write_page(result["dest"], template, values, minify)
+        results.append(result)
+    profiler = profiling.active()
+    if profiler is not None:
+        profiler.add_page(from_path, time.perf_counter() - start)
+    return results
+
+def bind_outputs(markdown, from_path, template_path, outputs, block_cache=None, index_text=False,
+                 images=None):
+    # Parses already-read markdown once and yields (result, template,
+    # values) for every (dest_path, basepath) in outputs; write_page
+    # renders and writes each of them.
+    page_template_path, values, deps, document = parse_markdown(
+        markdown, from_path, template_path, block_cache, images
+    )
+    terms = page_terms(document.text()) if index_text else None
+    fragments = shared_fragments(document, outputs)
+    for dest_path, basepath in outputs:
+        template, page_values = bind_page(page_template_path, values, fragments, basepath, images)
+        logger.debug("Generating page from %s to %s using %s", from_path, dest_path, template.path)
+        yield page_result(from_path, dest_path, deps, page_values, terms), template, page_values
+
+def write_page(dest_path, template, values, minify=False):
+    # Streams the page into a temporary file next to dest_path that only
+    # replaces it when the bytes differ, so neither the page nor the old
+    # output is held in memory whole. Minifying and profiling render the
+    # page to a string first.
+    tmp_path = dest_path + ".tmp"
+    if minify or profiling.active() is not None:
+        html = render_html(template, values, minify)
+        with stage("write"):
+            with open(tmp_path, "w") as file:
+                file.write(html)
+            return replace_if_changed(tmp_path, dest_path)
+    with open(tmp_path, "w") as file:
+        template.write(file, values)
+    return replace_if_changed(tmp_path, dest_path)
+
+def shared_fragments(document, outputs):
+    # With several outputs the HTML is serialized once, as one string, and
+    # only the basepath rewriting of that string is repeated per output. A
+    # single output streams its fragments as before.
+    if len(outputs) == 1:
+        return document.iter_html
+    with stage("html serialize"):
+        html = ["".join(document.iter_html())]
+    return lambda: html
+
+def render_html(template, values, minify=False):
+    if profiling.active() is not None:
+        # Join the content up front when profiling so serialization and
+        # templating are timed separately instead of interleaved.
+        with stage("html serialize"):
+            values["Content"] = "".join(values["Content"]())
+    with stage("template"):
+        html = template.render(values)
+    if minify:
+        with stage("minify"):
+            html = minify_html(html)
+    return html
+
+def page_result(from_path, dest_path, deps, values, terms=None, written=True):
+    result = {
+        "source": from_path,
+        "dest": dest_path,
+        "deps": deps,
+        "title": values["Title"],
+        "written": written,
+    }
+    if terms is not None:
+        result["terms"] = terms
+    return result
 
 def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for item in os.listdir(dir_path_content):
-        item_path = os.path.join(dir_path_content, item)
-        if os.path.isfile(item_path) and item.endswith(".md"):
-            rel_path = os.path.relpath(item_path, dir_path_content)
-            dest_file_path = os.path.join(dest_dir_path, rel_path.replace(".md", ".html"))
-            generate_page(item_path, template_path, dest_file_path, basepath)
-        elif os.path.isdir(item_path):
-            sub_dest_dir_path = os.path.join(dest_dir_path, item)
-            generate_pages_recursive(item_path, template_path, sub_dest_dir_path, basepath)
\ No newline at end of file
+    for from_path, dest_path in find_pages(dir_path_content, dest_dir_path):
+        generate_page(from_path, template_path, dest_path, basepath)
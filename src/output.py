@@ -0,0 +1,87 @@
+import os
+import re
+from compress import compress_written
+
+PRESERVE_TAGS = ("pre", "textarea", "script", "style")
+BLOCK_TAGS = (
+    "html", "head", "body", "meta", "link", "title", "base", "article", "section", "header",
+    "footer", "nav", "main", "aside", "div", "p", "h1", "h2", "h3", "h4", "h5", "h6",
+    "ul", "ol", "li", "blockquote", "table", "thead", "tbody", "tr", "th", "td",
+    "br", "hr", "figure", "figcaption", "!doctype",
+)
+
+preserve_pattern = re.compile(
+    r"(<(" + "|".join(PRESERVE_TAGS) + r")\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+comment_pattern = re.compile(r"<!--(?!\[).*?-->", re.DOTALL)
+whitespace_pattern = re.compile(r"\s+")
+block_tag_pattern = re.compile(
+    r"\s*(</?(?:" + "|".join(BLOCK_TAGS) + r")\b[^>]*>)\s*", re.IGNORECASE
+)
+
+def write_if_changed(path, data):
+    # Leaves the file (and its mtime) alone when it already holds exactly
+    # this content, so rsync and CDN syncs only see real changes. Returns
+    # whether the file was written.
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as file:
+                if file.read() == data:
+                    compress_written(path, False)
+                    return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    compress_written(path)
+    return True
+
+def same_contents(path, other_path, chunk_size=1024 * 1024):
+    if os.path.getsize(path) != os.path.getsize(other_path):
+        return False
+    with open(path, "rb") as file, open(other_path, "rb") as other:
+        while True:
+            chunk = file.read(chunk_size)
+            if chunk != other.read(chunk_size):
+                return False
+            if not chunk:
+                return True
+
+def replace_if_changed(tmp_path, path):
+    # Like write_if_changed for output already streamed into tmp_path: it
+    # replaces path only when the bytes differ, comparing them chunk by
+    # chunk, and is removed otherwise. Returns whether path was replaced.
+    try:
+        unchanged = same_contents(tmp_path, path)
+    except FileNotFoundError:
+        unchanged = False
+    if unchanged:
+        os.remove(tmp_path)
+        compress_written(path, False)
+        return False
+    os.replace(tmp_path, path)
+    compress_written(path)
+    return True
+
+def minify_whitespace(html):
+    html = comment_pattern.sub("", html)
+    html = whitespace_pattern.sub(" ", html)
+    return block_tag_pattern.sub(r"\1", html)
+
+def minify_html(html, strip=True):
+    # Drops comments and collapses whitespace, removing it entirely around
+    # block-level tags where it cannot affect rendering. The contents of
+    # <pre>, <textarea>, <script> and <style> are left untouched.
+    parts = preserve_pattern.split(html)
+    minified = []
+    # split() yields text, preserved block, tag name, text, ...
+    for i in range(0, len(parts), 3):
+        minified.append(minify_whitespace(parts[i]))
+        if i + 1 < len(parts):
+            minified.append(parts[i + 1])
+    minified = "".join(minified)
+    return minified.strip() if strip else minified
@@ -0,0 +1,84 @@
+import compress
+import loader
+import os
+import profiling
+from blockcache import get_block_cache
+from markdown_blocks import generate_page_outputs
+
+def generate_batch(batch, template_path, block_cache_path=None, profile=False, index_text=False,
+                   minify=False, images=None, bundle_path=None, compression=None):
+    # In a worker, profile=True starts a fresh profiler whose totals are
+    # returned for the parent to merge.
+    if bundle_path is not None:
+        loader.activate(loader.get_bundle(bundle_path))
+    if compression is not None:
+        compress.activate(compression)
+    if profile:
+        profiler = profiling.enable()
+    block_cache = get_block_cache(block_cache_path)
+    results = []
+    for from_path, outputs in batch:
+        try:
+            results.extend(
+                generate_page_outputs(
+                    from_path, template_path, outputs, block_cache, index_text, minify, images,
+                )
+            )
+        except Exception as e:
+            raise Exception(f"Failed to generate {from_path}: {e}") from e
+    if profile:
+        profiling.disable()
+        return results, profiler.snapshot()
+    return results, None
+
+def make_batches(pages, jobs, batch_size=None):
+    if batch_size is None:
+        # A few batches per worker keeps the pool balanced without paying
+        # the pickling and scheduling overhead of one task per page.
+        batch_size = max(1, min(64, len(pages) // (jobs * 4)))
+    return [pages[i:i + batch_size] for i in range(0, len(pages), batch_size)]
+
+def page_outputs(pages, basepath):
+    return [(from_path, [(dest_path, basepath)]) for from_path, dest_path in pages]
+
+def generate_pages_parallel(pages, template_path, basepath, jobs, batch_size=None,
+                            block_cache_path=None, index_text=False, minify=False,
+                            images=None, bundle_path=None):
+    return generate_outputs_parallel(
+        page_outputs(pages, basepath), template_path, jobs, batch_size, block_cache_path,
+        index_text, minify, images, bundle_path,
+    )
+
+def generate_outputs_parallel(items, template_path, jobs, batch_size=None, block_cache_path=None,
+                              index_text=False, minify=False, images=None, bundle_path=None):
+    # items are (from_path, [(dest_path, basepath), ...]); each source is
+    # parsed once by whichever worker gets it, whatever the output count.
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if jobs == 1 or len(items) <= 1:
+        # In-process: the caller's active bundle, if any, is already in use.
+        return generate_batch(
+            items, template_path, block_cache_path, index_text=index_text, minify=minify,
+            images=images,
+        )[0]
+    # Imported here so serial builds skip loading the process pool machinery.
+    from concurrent.futures import ProcessPoolExecutor
+
+    batches = make_batches(items, jobs, batch_size)
+    profiler = profiling.active()
+    results = []
+    with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as executor:
+        futures = [
+            executor.submit(
+                generate_batch, batch, template_path, block_cache_path,
+                profiler is not None, index_text, minify, images, bundle_path,
+                compress.settings,
+            )
+            for batch in batches
+        ]
+        for future in futures:
+            batch_results, snapshot = future.result()
+            results.extend(batch_results)
+            if snapshot is not None:
+                profiler.merge(snapshot)
+    return results
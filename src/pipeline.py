@@ -0,0 +1,90 @@
+import logging
+import os
+import time
+import profiling
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from loader import STREAM_THRESHOLD, read_text
+from markdown_blocks import bind_outputs, generate_page_outputs, write_page
+from parallel import page_outputs
+from profiling import stage
+
+logger = logging.getLogger(__name__)
+
+def generate_pages_pipelined(pages, template_path, basepath, readers=4, writers=4,
+                             window=64, block_cache=None, index_text=False, minify=False,
+                             images=None):
+    return generate_outputs_pipelined(
+        page_outputs(pages, basepath), template_path, readers, writers, window, block_cache,
+        index_text, minify, images,
+    )
+
+def generate_outputs_pipelined(items, template_path, readers=4, writers=4, window=64,
+                               block_cache=None, index_text=False, minify=False, images=None):
+    # Reads run ahead in a thread pool and writes drain behind in another,
+    # while pages are parsed in this thread; the writers template and write
+    # each output with write_page, as generate_page_outputs does. At most
+    # `window` reads and `window` writes are in flight, which bounds memory.
+    # Each source is parsed once for every (dest_path, basepath) it lists.
+    dest_dirs = {os.path.dirname(dest_path) for _, outputs in items for dest_path, _ in outputs}
+    for dest_dir in sorted(dest_dirs):
+        os.makedirs(dest_dir, exist_ok=True)
+    results = []
+    with ThreadPoolExecutor(max_workers=readers) as read_pool, \
+            ThreadPoolExecutor(max_workers=writers) as write_pool:
+        remaining = iter(items)
+        reads = deque()
+        writes = deque()
+
+        def fill_reads():
+            while len(reads) < window:
+                page = next(remaining, None)
+                if page is None:
+                    return
+                if os.path.getsize(page[0]) >= STREAM_THRESHOLD:
+                    # Huge pages are streamed in this thread, never read whole.
+                    reads.append((page, None))
+                else:
+                    reads.append((page, read_pool.submit(read_text, page[0])))
+
+        def wait_write():
+            result, future = writes.popleft()
+            try:
+                result["written"] = future.result()
+            except Exception as e:
+                raise Exception(f"Failed to generate {result['source']}: {e}") from e
+
+        fill_reads()
+        while reads:
+            (from_path, outputs), read_future = reads.popleft()
+            fill_reads()
+            if read_future is None:
+                try:
+                    results.extend(generate_page_outputs(
+                        from_path, template_path, outputs, block_cache, index_text, minify, images,
+                    ))
+                except Exception as e:
+                    raise Exception(f"Failed to generate {from_path}: {e}") from e
+                continue
+            start = time.perf_counter()
+            try:
+                with stage("read"):
+                    markdown = read_future.result()
+                bound = list(bind_outputs(
+                    markdown, from_path, template_path, outputs, block_cache, index_text, images,
+                ))
+            except Exception as e:
+                raise Exception(f"Failed to generate {from_path}: {e}") from e
+            for result, template, values in bound:
+                results.append(result)
+                writes.append((result, write_pool.submit(
+                    write_page, result["dest"], template, values, minify,
+                )))
+            while len(writes) > window:
+                wait_write()
+            profiler = profiling.active()
+            if profiler is not None:
+                profiler.add_page(from_path, time.perf_counter() - start)
+        while writes:
+            wait_write()
+    return results
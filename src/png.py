@@ -0,0 +1,145 @@
+import operator
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+def png_size(header):
+    # The IHDR chunk always comes first, so the first 24 bytes are enough.
+    if header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        raise ValueError("not a PNG file")
+    return struct.unpack(">II", header[16:24])
+
+def read_chunks(data):
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError("not a PNG file")
+    pos = 8
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IEND":
+            return
+
+def unfilter(raw, width, height, bpp):
+    stride = width * bpp
+    rows = []
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        filter_type = raw[start]
+        line = bytearray(raw[start + 1:start + 1 + stride])
+        if filter_type == 1:
+            for x in range(bpp, stride):
+                line[x] = (line[x] + line[x - bpp]) & 0xFF
+        elif filter_type == 2:
+            line = bytearray(map(lambda a, b: (a + b) & 0xFF, line, previous))
+        elif filter_type == 3:
+            for x in range(stride):
+                left = line[x - bpp] if x >= bpp else 0
+                line[x] = (line[x] + ((left + previous[x]) >> 1)) & 0xFF
+        elif filter_type == 4:
+            for x in range(stride):
+                a = line[x - bpp] if x >= bpp else 0
+                b = previous[x]
+                c = previous[x - bpp] if x >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                if pa <= pb and pa <= pc:
+                    predictor = a
+                elif pb <= pc:
+                    predictor = b
+                else:
+                    predictor = c
+                line[x] = (line[x] + predictor) & 0xFF
+        elif filter_type != 0:
+            raise ValueError(f"unknown PNG filter type {filter_type}")
+        rows.append(bytes(line))
+        previous = line
+    return rows
+
+def expand_palette(rows, palette, alpha):
+    channels = 4 if alpha else 3
+    colors = []
+    for i in range(len(palette) // 3):
+        color = palette[i * 3:i * 3 + 3]
+        if alpha:
+            color += bytes([alpha[i] if i < len(alpha) else 0xFF])
+        colors.append(color)
+    return [b"".join(colors[index] for index in row) for row in rows], channels
+
+def decode_png(data):
+    # Returns (width, height, channels, rows) for 8-bit, non-interlaced
+    # images. Palette images are expanded to RGB or RGBA.
+    header = None
+    palette = b""
+    alpha = b""
+    idat = []
+    for kind, chunk in read_chunks(data):
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = chunk
+        elif kind == b"tRNS":
+            alpha = chunk
+        elif kind == b"IDAT":
+            idat.append(chunk)
+    if header is None:
+        raise ValueError("PNG file has no IHDR chunk")
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or interlace != 0 or color_type not in CHANNELS:
+        raise ValueError("only 8-bit non-interlaced PNG files are supported")
+    channels = CHANNELS[color_type]
+    rows = unfilter(zlib.decompress(b"".join(idat)), width, height, channels)
+    if color_type == 3:
+        rows, channels = expand_palette(rows, palette, alpha)
+    return width, height, channels, rows
+
+def spans(size, new_size):
+    return [
+        (i * size // new_size, max((i + 1) * size // new_size, i * size // new_size + 1))
+        for i in range(new_size)
+    ]
+
+def resize(width, height, channels, rows, new_width):
+    # Box filter: every output pixel averages the source pixels it covers.
+    new_height = max(1, round(height * new_width / width))
+    column_spans = spans(width, new_width)
+    narrow = []
+    for row in rows:
+        line = bytearray(new_width * channels)
+        for x, (x0, x1) in enumerate(column_spans):
+            count = x1 - x0
+            for c in range(channels):
+                line[x * channels + c] = sum(row[x0 * channels + c:x1 * channels:channels]) // count
+        narrow.append(line)
+    resized = []
+    for y0, y1 in spans(height, new_height):
+        total = list(narrow[y0])
+        for row in narrow[y0 + 1:y1]:
+            total = list(map(operator.add, total, row))
+        count = y1 - y0
+        resized.append(bytes(value // count for value in total))
+    return new_width, new_height, resized
+
+def encode_png(width, height, channels, rows, level=9):
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    # Filter type 2 (up) is cheap to compute here and compresses photos far
+    # better than unfiltered rows.
+    raw = bytearray()
+    previous = bytes(width * channels)
+    for row in rows:
+        raw.append(2)
+        raw.extend(map(lambda a, b: (a - b) & 0xFF, row, previous))
+        previous = row
+    return (
+        PNG_SIGNATURE
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(bytes(raw), level))
+        + chunk(b"IEND", b"")
+    )
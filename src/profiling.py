@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+STAGES = (
+    "discovery",
+    "read",
+    "block split",
+    "inline parse",
+    "html serialize",
+    "template",
+    "minify",
+    "write",
+    "static copy",
+    "images",
+    "compress",
+)
+
+_active = None
+_no_stage = nullcontext()
+
+class StageTimer():
+    __slots__ = ("profiler", "name", "wall", "cpu")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add_stage(
+            self.name,
+            time.perf_counter() - self.wall,
+            time.process_time() - self.cpu,
+        )
+        return False
+
+class Profiler():
+    # Stages are timed from the pipeline's reader and writer threads too, so
+    # updates to the totals are made under a lock.
+    def __init__(self):
+        self.stages = {}
+        self.pages = []
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        return StageTimer(self, name)
+
+    def add_stage(self, name, wall, cpu, calls=1):
+        with self.lock:
+            totals = self.stages.setdefault(name, [0.0, 0.0, 0])
+            totals[0] += wall
+            totals[1] += cpu
+            totals[2] += calls
+
+    def add_page(self, source, seconds):
+        with self.lock:
+            self.pages.append((source, seconds))
+
+    def snapshot(self):
+        return {"stages": self.stages, "pages": self.pages}
+
+    def merge(self, snapshot):
+        for name, (wall, cpu, calls) in snapshot["stages"].items():
+            self.add_stage(name, wall, cpu, calls)
+        with self.lock:
+            self.pages.extend(tuple(page) for page in snapshot["pages"])
+
+    def report(self, top=10):
+        # Stages run inside worker processes add up CPU and wall time across
+        # workers, so their totals can exceed the build's wall time.
+        order = {name: i for i, name in enumerate(STAGES)}
+        stages = [
+            {"stage": name, "wall_seconds": wall, "cpu_seconds": cpu, "calls": calls}
+            for name, (wall, cpu, calls) in sorted(
+                self.stages.items(), key=lambda item: order.get(item[0], len(order))
+            )
+        ]
+        slowest = sorted(self.pages, key=lambda page: page[1], reverse=True)[:top]
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "pages": len(self.pages),
+            "peak_memory_bytes": peak_memory(),
+            "stages": stages,
+            "slowest_pages": [
+                {"source": source, "seconds": seconds} for source, seconds in slowest
+            ],
+        }
+
+    def write_report(self, path, top=10):
+        report = self.report(top)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(report, file, indent=1)
+        return report
+
+def peak_memory():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+def enable():
+    global _active
+    _active = Profiler()
+    return _active
+
+def disable():
+    global _active
+    _active = None
+
+def active():
+    return _active
+
+def stage(name):
+    if _active is None:
+        return _no_stage
+    return _active.stage(name)
+
+def format_report(report):
+    lines = [f"Build took {report['wall_seconds']:.3f}s for {report['pages']} pages"]
+    if report["peak_memory_bytes"] is not None:
+        lines.append(f"Peak memory: {report['peak_memory_bytes'] / (1024 * 1024):.1f} MiB")
+    for entry in report["stages"]:
+        lines.append(
+            f"  {entry['stage']:<15} wall {entry['wall_seconds']:8.3f}s  "
+            f"cpu {entry['cpu_seconds']:8.3f}s  calls {entry['calls']}"
+        )
+    if report["slowest_pages"]:
+        lines.append("Slowest pages:")
+        for entry in report["slowest_pages"]:
+            lines.append(f"  {entry['seconds'] * 1000:8.2f}ms  {entry['source']}")
+    return "\n".join(lines)
@@ -0,0 +1,110 @@
+import gzip
+import json
+import logging
+import os
+import re
+from collections import Counter
+from output import write_if_changed
+
+logger = logging.getLogger(__name__)
+
+SEARCH_VERSION = "1"
+MIN_TERM_LENGTH = 2
+
+term_pattern = re.compile(r"[^\W_]+")
+
+def tokenize(text):
+    return [
+        term for term in term_pattern.findall(text.lower())
+        if len(term) >= MIN_TERM_LENGTH
+    ]
+
+def page_terms(text):
+    return dict(Counter(tokenize(text)))
+
+class SearchIndex():
+    # An inverted index kept as term -> {source: count}. Pages are added and
+    # removed one at a time using the terms stored for them, so a build only
+    # touches the postings of pages whose text changed. Each page keeps the
+    # hashes of the files its terms were read from, to tell when it did.
+    def __init__(self, pages=None, postings=None):
+        self.pages = pages if pages is not None else {}
+        self.postings = postings if postings is not None else {}
+
+    def remove_page(self, source):
+        page = self.pages.pop(source, None)
+        if page is None:
+            return
+        for term in page["terms"]:
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(source, None)
+            if not posting:
+                del self.postings[term]
+
+    def add_page(self, source, url, title, terms, digests=None):
+        self.remove_page(source)
+        self.pages[source] = {"url": url, "title": title, "terms": terms, "digests": digests or {}}
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[source] = count
+
+    def is_current(self, source, digests):
+        page = self.pages.get(source)
+        return page is not None and page.get("digests") == digests
+
+    def retain(self, sources):
+        for source in set(self.pages) - set(sources):
+            self.remove_page(source)
+
+    def search(self, query):
+        scores = Counter()
+        for term in tokenize(query):
+            for source, count in self.postings.get(term, {}).items():
+                scores[source] += count
+        return [source for source, _ in scores.most_common()]
+
+    def state(self):
+        return {"version": SEARCH_VERSION, "pages": self.pages, "postings": self.postings}
+
+    def compact(self, url_prefix="/"):
+        # Documents are numbered in URL order, and each posting list is
+        # flattened to [doc delta, count, doc delta, count, ...].
+        sources = sorted(self.pages, key=lambda source: self.pages[source]["url"])
+        doc_ids = {source: i for i, source in enumerate(sources)}
+        docs = [
+            [url_prefix.rstrip("/") + self.pages[source]["url"], self.pages[source]["title"]]
+            for source in sources
+        ]
+        terms = {}
+        for term, posting in self.postings.items():
+            flat = []
+            previous = 0
+            for doc_id, count in sorted((doc_ids[source], count) for source, count in posting.items()):
+                flat.extend((doc_id - previous, count))
+                previous = doc_id
+            terms[term] = flat
+        return {"version": int(SEARCH_VERSION), "docs": docs, "terms": terms}
+
+def load_search_index(path):
+    try:
+        with open(path) as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return SearchIndex()
+    if state.get("version") != SEARCH_VERSION:
+        return SearchIndex()
+    return SearchIndex(state["pages"], state["postings"])
+
+def save_search_index(path, index):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(index.state(), file, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, path)
+
+def write_search_index(path, index, url_prefix="/"):
+    # mtime=0 keeps the gzip output identical for identical input.
+    data = json.dumps(index.compact(url_prefix), separators=(",", ":"), sort_keys=True)
+    write_if_changed(path, gzip.compress(data.encode("utf-8"), mtime=0))
+    logger.info(f"Wrote search index for {len(index.pages)} pages and {len(index.postings)} terms to {path}")
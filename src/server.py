@@ -0,0 +1,181 @@
+import email.utils
+import hashlib
+import logging
+import mimetypes
+import os
+import posixpath
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+from copystatic import DEFAULT_IGNORE, is_ignored
+from markdown_blocks import render_page
+
+logger = logging.getLogger(__name__)
+
+class PageCache():
+    # Rendered pages keyed by source path. An entry is valid while the
+    # mtime and size of every file it was rendered from are unchanged.
+    def __init__(self, template_path, basepath="/", block_cache=None):
+        self.template_path = template_path
+        self.basepath = basepath
+        self.block_cache = block_cache
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def stamps(self, paths):
+        stamps = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return None
+            stamps.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamps)
+
+    def get(self, from_path):
+        with self.lock:
+            entry = self.entries.get(from_path)
+        if entry is not None and self.stamps(p for p, _, _ in entry[0]) == entry[0]:
+            return entry[1], entry[2]
+        html, deps = render_page(from_path, self.template_path, self.basepath, self.block_cache)
+        body = html.encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        with self.lock:
+            self.entries[from_path] = (self.stamps(deps), body, etag)
+        return body, etag
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SiteGenerator"
+
+    def log_message(self, format, *args):
+        logger.info("%s - " + format, self.address_string(), *args)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body):
+        path = posixpath.normpath(unquote(urlsplit(self.path).path))
+        if path.startswith("//"):
+            path = path[1:]
+        rel_path = self.server.site_path(path)
+        if rel_path is None or rel_path.startswith(".."):
+            self.send_error(404)
+            return
+        source = self.server.page_source(rel_path)
+        if source is not None:
+            try:
+                body, etag = self.server.pages.get(source)
+            except Exception as e:
+                self.send_error(500, f"Failed to render {source}: {e}")
+                return
+            self.send_body(body, "text/html; charset=utf-8", etag, None, send_body)
+            return
+        static_path = os.path.join(self.server.dir_path_static, rel_path)
+        if (rel_path and os.path.isfile(static_path)
+                and not any(is_ignored(part, DEFAULT_IGNORE) for part in rel_path.split("/"))):
+            self.send_static(static_path, send_body)
+            return
+        self.send_error(404)
+
+    def send_static(self, static_path, send_body):
+        stat = os.stat(static_path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        content_type = mimetypes.guess_type(static_path)[0] or "application/octet-stream"
+        if self.not_modified(etag, stat.st_mtime):
+            self.send_not_modified(etag, stat.st_mtime)
+            return
+        with open(static_path, "rb") as file:
+            body = file.read()
+        self.send_body(body, content_type, etag, stat.st_mtime, send_body)
+
+    def not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None or mtime is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+
+    def send_cache_headers(self, etag, mtime):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        if mtime is not None:
+            self.send_header("Last-Modified", email.utils.formatdate(mtime, usegmt=True))
+
+    def send_not_modified(self, etag, mtime):
+        self.send_response(304)
+        self.send_cache_headers(etag, mtime)
+        self.end_headers()
+
+    def send_body(self, body, content_type, etag, mtime, send_body):
+        if mtime is None and self.not_modified(etag, None):
+            self.send_not_modified(etag, None)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_cache_headers(etag, mtime)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+class DevServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, dir_path_content, dir_path_static, template_path,
+                 basepath="/", block_cache=None):
+        super().__init__(address, DevRequestHandler)
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.basepath = basepath
+        self.pages = PageCache(template_path, basepath, block_cache)
+
+    def site_path(self, path):
+        # Pages link to everything under the basepath, so requests are served
+        # with it stripped; paths outside it return None.
+        prefix = self.basepath.rstrip("/")
+        if prefix:
+            if path != prefix and not path.startswith(prefix + "/"):
+                return None
+            path = path[len(prefix):]
+        return path.lstrip("/")
+
+    def page_source(self, rel_path):
+        # "/", "/blog/tom", "/blog/tom/" and "/blog/tom/index.html" all map to
+        # content/blog/tom/index.md; "/about.html" maps to content/about.md.
+        # Includes under "_" names are never served as pages.
+        if any(part.startswith("_") for part in rel_path.split("/")):
+            return None
+        if rel_path in ("", "."):
+            candidates = ["index.md"]
+        elif rel_path.endswith(".html"):
+            candidates = [rel_path[:-len(".html")] + ".md"]
+        elif "." in posixpath.basename(rel_path):
+            return None
+        else:
+            candidates = [posixpath.join(rel_path, "index.md"), rel_path + ".md"]
+        for candidate in candidates:
+            source = os.path.join(self.dir_path_content, candidate)
+            if os.path.isfile(source):
+                return source
+        return None
+
+def serve(dir_path_content, dir_path_static, template_path, port=8888, host="127.0.0.1",
+          basepath="/", block_cache=None):
+    server = DevServer((host, port), dir_path_content, dir_path_static, template_path,
+                       basepath, block_cache)
+    logger.info(f"Serving {dir_path_content} and {dir_path_static} on http://{host}:{port}{basepath} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopped serving")
+    finally:
+        server.server_close()
@@ -0,0 +1,173 @@
+import logging
+import os
+import posixpath
+from urllib.parse import urlsplit
+from includes import expand_includes
+from loader import STREAM_THRESHOLD, read_text
+from manifest import current_hash, load_manifest, save_manifest
+from templates import split_page_metadata
+from utility import extract_markdown_images, extract_markdown_links
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = "3"
+
+def page_url(from_path, dir_path_content):
+    # content/index.md -> "/", content/blog/tom/index.md -> "/blog/tom",
+    # content/about.md -> "/about"
+    rel_path = os.path.relpath(from_path, dir_path_content).replace(os.sep, "/")
+    url = "/" + rel_path[:-len(".md")]
+    if url == "/index":
+        return "/"
+    if url.endswith("/index"):
+        return url[:-len("/index")]
+    return url
+
+def page_href(from_path, url):
+    # The path the page is published at: "/blog/tom/" for an index page,
+    # "/about.html" otherwise.
+    if url == "/":
+        return url
+    if os.path.basename(from_path) == "index.md":
+        return url + "/"
+    return url + ".html"
+
+def link_base(from_path, url):
+    # Relative links resolve against the directory of the output file:
+    # blog/tom/index.html for an index page, the parent for about.html.
+    if os.path.basename(from_path) == "index.md":
+        return url
+    return posixpath.dirname(url)
+
+def normalize_url(target, base):
+    # Resolves a link target relative to the directory `base` to the form
+    # page_url produces. Returns None for external and in-page links.
+    parts = urlsplit(target)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = parts.path
+    if not path.startswith("/"):
+        path = posixpath.join(base, path)
+    path = posixpath.normpath(path)
+    if path.startswith("//"):
+        path = path[1:]
+    if path.endswith("/index.html"):
+        path = path[:-len("/index.html")] or "/"
+    elif path.endswith(".html"):
+        path = path[:-len(".html")]
+    return path
+
+def index_page(from_path, dest_path, dir_path_content, digest=None, hashes=None):
+    if hashes is None:
+        hashes = {}
+    # The renderer is only imported once a page has to be indexed, so an
+    # incremental build with nothing to do never loads it.
+    if os.path.getsize(from_path) >= STREAM_THRESHOLD:
+        from streaming import scan_references
+
+        metadata, title, links, images, includes = scan_references(from_path)
+    else:
+        from markdown_blocks import extract_title
+
+        metadata, markdown = split_page_metadata(read_text(from_path))
+        markdown, includes = expand_includes(markdown, from_path)
+        try:
+            title = extract_title(markdown)
+        except Exception:
+            title = None
+        links = [url for _, url in extract_markdown_links(markdown)]
+        images = [url for _, url in extract_markdown_images(markdown)]
+    return {
+        "dest": dest_path,
+        "url": page_url(from_path, dir_path_content),
+        "title": title,
+        "metadata": metadata,
+        "modified": os.stat(from_path).st_mtime,
+        "hash": digest,
+        "includes": {path: current_hash(path, hashes) for path in includes},
+        "links": links,
+        "images": images,
+    }
+
+def page_digests(source, entry):
+    # The hash of every file a page's text comes from: its source and the
+    # files it includes.
+    return {source: entry["hash"], **entry["includes"]}
+
+def new_site_index():
+    return {"version": INDEX_VERSION, "pages": {}}
+
+def load_site_index(path):
+    index = load_manifest(path)
+    if index is None or index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+def save_site_index(path, index):
+    save_manifest(path, index)
+
+def build_site_index(pages, dir_path_content, previous=None, hashes=None):
+    # Entries whose source hash is unchanged are reused from the previous
+    # index, so an incremental build only re-reads edited pages. `hashes`
+    # is shared with plan_build to avoid hashing sources twice.
+    if hashes is None:
+        hashes = {}
+    old_pages = {} if previous is None else previous["pages"]
+    index = new_site_index()
+    reused = 0
+    for from_path, dest_path in pages:
+        digest = current_hash(from_path, hashes)
+        old = old_pages.get(from_path)
+        if (old is not None and old["hash"] == digest and old["dest"] == dest_path
+                and all(current_hash(path, hashes) == h for path, h in old["includes"].items())):
+            index["pages"][from_path] = old
+            reused += 1
+        else:
+            index["pages"][from_path] = index_page(
+                from_path, dest_path, dir_path_content, digest, hashes
+            )
+    logger.debug(f"Indexed {len(pages) - reused} pages, reused {reused}")
+    return index
+
+class LinkGraph():
+    # Link validation, backlinks and orphans for a whole site index,
+    # computed in a single pass over every page's outgoing links.
+    def __init__(self, index, dir_path_static=None):
+        self.dir_path_static = dir_path_static
+        self.sources = {entry["url"]: source for source, entry in index["pages"].items()}
+        self.outgoing = {}
+        self.backlinks = {source: set() for source in index["pages"]}
+        self.broken = []
+        self.static = {}
+        for source, entry in index["pages"].items():
+            targets = set()
+            base = link_base(source, entry["url"])
+            for kind in ("links", "images"):
+                for target in entry[kind]:
+                    url = normalize_url(target, base)
+                    if url is None:
+                        continue
+                    linked = self.sources.get(url)
+                    if linked is not None:
+                        if kind == "links":
+                            targets.add(linked)
+                    elif not self.static_exists(url):
+                        self.broken.append((source, target))
+            targets.discard(source)
+            self.outgoing[source] = targets
+            for linked in targets:
+                self.backlinks[linked].add(source)
+
+    def static_exists(self, url):
+        if self.dir_path_static is None:
+            return False
+        if url not in self.static:
+            self.static[url] = os.path.isfile(os.path.join(self.dir_path_static, url.lstrip("/")))
+        return self.static[url]
+
+    def orphans(self, roots=("/",)):
+        root_sources = {self.sources[url] for url in roots if url in self.sources}
+        return sorted(
+            source for source, linked_from in self.backlinks.items()
+            if not linked_from and source not in root_sources
+        )
@@ -0,0 +1,118 @@
+import contextlib
+import itertools
+import logging
+from collections import Counter
+from blocktypes import scan_blocks
+from flatdoc import block_document
+from includes import include_lines
+from output import minify_html, replace_if_changed
+from profiling import stage
+from search import tokenize
+from templates import load_template, metadata_pattern, resolve_template_path, rewrite_basepath
+from utility import extract_markdown_images, extract_markdown_links
+
+logger = logging.getLogger(__name__)
+
+def body_lines(file):
+    # Consumes the leading "<!-- key: value -->" lines and returns the
+    # metadata and an iterator over the remaining lines of the file.
+    metadata = {}
+    for line in file:
+        match = metadata_pattern.match(line)
+        if match is None or match.end() != len(line):
+            return metadata, itertools.chain([line], file)
+        metadata[match.group(1)] = match.group(2)
+    return metadata, iter(())
+
+def stream_title(from_path):
+    # First pass: stops reading at the title line, so it is cheap when the
+    # title is near the top, as it almost always is.
+    with open(from_path) as file:
+        _, lines = body_lines(file)
+        for line in include_lines(lines, from_path, []):
+            if line.startswith("# "):
+                return line[2:].strip()
+    raise Exception("The header must start with a single #")
+
+def scan_references(from_path):
+    # Titles, links, images and included files for the site index, one
+    # line at a time.
+    title = None
+    links = []
+    images = []
+    includes = []
+    with open(from_path) as file:
+        metadata, lines = body_lines(file)
+        for line in include_lines(lines, from_path, includes):
+            if title is None and line.startswith("# "):
+                title = line[2:].strip()
+            links.extend(url for _, url in extract_markdown_links(line))
+            images.extend(url for _, url in extract_markdown_images(line))
+    return metadata, title, links, images, includes
+
+def stream_content(lines, basepaths, images=None, terms=None, image_deps=None):
+    # Yields the content one block at a time as a tuple with the block's
+    # HTML for each basepath, so every output shares a single parse.
+    yield ("<div>",) * len(basepaths)
+    for block in scan_blocks(lines):
+        document = block_document(block)
+        html = document.to_html()
+        if images is not None:
+            image_deps.update(images.dependencies(block.text))
+        if terms is not None:
+            terms.update(tokenize(document.text()))
+        yield tuple(
+            rewrite_basepath(html if images is None else images.rewrite(html, basepath), basepath)
+            for basepath in basepaths
+        )
+    yield ("</div>",) * len(basepaths)
+
+def stream_page(from_path, template_path, outputs, index_text=False, minify=False, images=None):
+    # Renders one block at a time and writes it to every (dest_path,
+    # basepath) in outputs, so the file is read and parsed once and memory
+    # is bounded by the largest block rather than the file. Each output
+    # goes to its own temporary file that only replaces dest_path when the
+    # bytes differ. Returns one result per output.
+    title = stream_title(from_path)
+    terms = Counter() if index_text else None
+    image_deps = set()
+    includes = []
+    basepaths = [basepath for _, basepath in outputs]
+    with open(from_path) as file:
+        metadata, lines = body_lines(file)
+        lines = include_lines(lines, from_path, includes)
+        template_path = resolve_template_path(template_path, metadata)
+        with stage("template"):
+            templates = [load_template(template_path, basepath) for basepath in basepaths]
+        # The templates only differ in their basepath, so they yield the
+        # same number of fragments and can be rendered side by side; tee
+        # then holds at most one block for outputs that are behind.
+        contents = itertools.tee(stream_content(lines, basepaths, images, terms, image_deps), len(outputs))
+        renders = []
+        for i, (template, basepath) in enumerate(zip(templates, basepaths)):
+            values = dict(metadata)
+            values["Title"] = title
+            values["Basepath"] = basepath
+            values["Content"] = lambda i=i: (blocks[i] for blocks in contents[i])
+            renders.append(template.iter_render(values))
+            logger.debug("Streaming page from %s to %s using %s", from_path, outputs[i][0], template.path)
+        with contextlib.ExitStack() as stack:
+            files = [stack.enter_context(open(dest_path + ".tmp", "w")) for dest_path, _ in outputs]
+            for fragments in zip(*renders):
+                for output, fragment in zip(files, fragments):
+                    # Fragments are minified separately, which can leave a
+                    # single space where two of them meet.
+                    output.write(minify_html(fragment, strip=False) if minify else fragment)
+    results = []
+    for (dest_path, _), template in zip(outputs, templates):
+        result = {
+            "source": from_path,
+            "dest": dest_path,
+            "deps": [from_path, template_path] + template.deps + includes + sorted(image_deps),
+            "title": title,
+            "written": replace_if_changed(dest_path + ".tmp", dest_path),
+        }
+        if index_text:
+            result["terms"] = dict(terms)
+        results.append(result)
+    return results
@@ -0,0 +1,56 @@
+from loader import find_pages, scan_sources
+from siteindex import build_site_index, load_site_index, save_site_index
+
+# A target is one deployment of the site: a dict with the basepath links
+# are rewritten to, the output directory, the directory its manifests are
+# kept in ("state") and optionally a locale overlay, a content directory
+# whose pages replace the pages at the same path for this target only.
+# During a build it also collects its pages, site index, manifest and the
+# pages it has to render.
+
+def overlay_pages(pages, dir_path_overlay, dest_dir_path):
+    # Returns the target's pages and the subset that come from the overlay.
+    # Overlay pages without a counterpart in the content are added.
+    overlay = find_pages(dir_path_overlay, dest_dir_path, scan_sources(dir_path_overlay))
+    by_dest = {dest_path: from_path for from_path, dest_path in overlay}
+    merged = [(by_dest.pop(dest_path, from_path), dest_path) for from_path, dest_path in pages]
+    merged.extend((from_path, dest_path) for from_path, dest_path in overlay if dest_path in by_dest)
+    return merged, overlay
+
+def overlay_site_index(site_index, overlay, dir_path_overlay, hashes, state_path=None):
+    # The shared index with the overlay's pages swapped in by URL, so feeds
+    # and search for the target list translated titles. The overlay's own
+    # index is kept at state_path, so unchanged overlay pages are not
+    # read again.
+    previous = None if state_path is None else load_site_index(state_path)
+    overlay_index = build_site_index(overlay, dir_path_overlay, previous, hashes)
+    if state_path is not None:
+        save_site_index(state_path, overlay_index)
+    replaced = overlay_index["pages"]
+    urls = {entry["url"] for entry in replaced.values()}
+    index = dict(site_index)
+    index["pages"] = {
+        source: entry for source, entry in site_index["pages"].items() if entry["url"] not in urls
+    }
+    index["pages"].update(replaced)
+    return index
+
+def group_outputs(targets):
+    # Merges the pages each target has to render into (from_path, outputs)
+    # items, one per source, in order of first appearance. A source shared
+    # by several targets is then parsed once and written once per target.
+    items = {}
+    for target in targets:
+        for from_path, dest_path in target["to_render"]:
+            items.setdefault(from_path, []).append((dest_path, target["basepath"]))
+    return list(items.items())
+
+def split_results(results, targets):
+    # Hands each result back to the target whose output it was written to.
+    by_dest = {}
+    for target in targets:
+        target["results"] = []
+        for _, dest_path in target["to_render"]:
+            by_dest[dest_path] = target
+    for result in results:
+        by_dest[result["dest"]]["results"].append(result)
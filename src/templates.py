@@ -0,0 +1,124 @@
+import os
+import re
+
+placeholder_pattern = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+partial_pattern = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+metadata_pattern = re.compile(r"[ \t]*<!--\s*([\w-]+)\s*:\s*(.*?)\s*-->[ \t]*(?:\n|\Z)")
+
+_template_cache = {}
+
+def rewrite_basepath(html, basepath):
+    if basepath == "/":
+        return html
+    html = html.replace('href="/', f'href="{basepath}')
+    return html.replace('src="/', f'src="{basepath}')
+
+class Template():
+    def __init__(self, path, text, basepath="/", deps=()):
+        self.path = path
+        self.basepath = basepath
+        # Partial files inlined into text, in the order they were read.
+        self.deps = list(deps)
+        # re.split with a capturing group alternates literal text and slot
+        # names: [literal, slot, literal, slot, ..., literal]
+        parts = placeholder_pattern.split(text)
+        self.literals = [rewrite_basepath(part, basepath) for part in parts[0::2]]
+        self.slots = parts[1::2]
+        # Placeholders without a value are left in the output as written,
+        # as the original str.replace rendering did.
+        self.placeholders = [match.group(0) for match in placeholder_pattern.finditer(text)]
+
+    def iter_render(self, values):
+        literals = self.literals
+        for i, slot in enumerate(self.slots):
+            yield literals[i]
+            if slot not in values:
+                yield self.placeholders[i]
+                continue
+            value = values[slot]
+            if callable(value):
+                value = value()
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+        yield literals[-1]
+
+    def render(self, values):
+        return "".join(self.iter_render(values))
+
+    def write(self, file, values):
+        for fragment in self.iter_render(values):
+            file.write(fragment)
+
+    def __repr__(self):
+        return f"Template({self.path}, {self.slots}, {self.basepath})"
+
+def expand_partials(text, path, stack=()):
+    # Inlines "{{> name.html }}" partials, resolved against the directory
+    # of the file that uses them. Returns the text and every partial read.
+    if "{{>" not in text:
+        return text, []
+    stack = stack + (os.path.normpath(path),)
+    deps = []
+
+    def inline(match):
+        partial_path = os.path.join(os.path.dirname(path), match.group(1))
+        if os.path.normpath(partial_path) in stack:
+            raise ValueError(f"{path}: partial {match.group(1)} includes itself")
+        try:
+            with open(partial_path) as file:
+                partial = file.read()
+        except FileNotFoundError:
+            raise ValueError(f"{path}: partial {match.group(1)} not found") from None
+        partial, partial_deps = expand_partials(partial, partial_path, stack)
+        deps.append(partial_path)
+        deps.extend(partial_deps)
+        return partial
+
+    return partial_pattern.sub(inline, text), deps
+
+def file_stamps(paths):
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamps.append((stat.st_mtime_ns, stat.st_size))
+    return stamps
+
+def load_template(path, basepath="/"):
+    # Templates are parsed once and reused until the file, or any partial
+    # it uses, changes on disk.
+    key = (os.path.abspath(path), basepath)
+    cached = _template_cache.get(key)
+    if cached is not None and file_stamps([path] + cached[1].deps) == cached[0]:
+        return cached[1]
+    stamps = file_stamps([path])
+    with open(path) as file:
+        text, deps = expand_partials(file.read(), path)
+    template = Template(path, text, basepath, deps)
+    partial_stamps = file_stamps(deps)
+    if stamps is not None and partial_stamps is not None:
+        _template_cache[key] = (stamps + partial_stamps, template)
+    return template
+
+def split_page_metadata(markdown):
+    # Leading "<!-- key: value -->" lines select a template ("template") or
+    # supply values for extra placeholders; they are not rendered.
+    metadata = {}
+    pos = 0
+    while True:
+        match = metadata_pattern.match(markdown, pos)
+        if match is None or match.end() == pos:
+            break
+        metadata[match.group(1)] = match.group(2)
+        pos = match.end()
+    return metadata, markdown[pos:]
+
+def resolve_template_path(default_template_path, metadata):
+    name = metadata.get("template")
+    if not name:
+        return default_template_path
+    return os.path.join(os.path.dirname(default_template_path), name)
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from blockcache import BlockCache
+from markdown_blocks import markdown_to_html_node
+
+LONG_PARAGRAPH = "This paragraph has **bold** text and a [link](/x). " * 10
+
+class TestBlockCache(unittest.TestCase):
+    def test_cached_render_matches_uncached(self):
+        md = f"# Title\n\n{LONG_PARAGRAPH}\n\n- a\n- b\n\n{LONG_PARAGRAPH}"
+        cache = BlockCache()
+        expected = markdown_to_html_node(md).to_html()
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 1)
+
+    def test_small_blocks_bypass_cache(self):
+        cache = BlockCache()
+        markdown_to_html_node("# Title\n\nshort", cache)
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_memory_lru_eviction(self):
+        cache = BlockCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+
+    def test_disk_store_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as root:
+            md = f"# Title\n\n{LONG_PARAGRAPH}"
+            markdown_to_html_node(md, BlockCache(root))
+            cache = BlockCache(root)
+            html = markdown_to_html_node(md, cache).to_html()
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(html, markdown_to_html_node(md).to_html())
+
+    def test_prune_bounds_disk_entries_and_drops_old_versions(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "v0"))
+            cache = BlockCache(root, max_disk_entries=2)
+            for i in range(5):
+                cache.put(cache.key(str(i)), str(i))
+            self.assertEqual(cache.prune(), 3)
+            self.assertFalse(os.path.exists(os.path.join(root, "v0")))
+            count = sum(len(files) for _, _, files in os.walk(root))
+            self.assertEqual(count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
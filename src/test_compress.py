@@ -0,0 +1,74 @@
+import gzip
+import os
+import unittest
+
+import compress
+from compress import LEVEL, MIN_SIZE, compress_outputs, is_compressible
+from manifest import remove_outputs
+from output import write_if_changed
+from testsupport import TempDirTestCase
+
+class TestCompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = self.path("docs")
+        self.state = self.path("cache/compressed.json")
+        self.write("docs/index.html", "<p>hello</p>" * 200)
+        self.write("docs/css/site.css", "body { margin: 0; }" * 100)
+        self.write("docs/small.html", "<p>hi</p>")
+        self.write("docs/images/a.png", "x" * 5000)
+
+    def test_is_compressible(self):
+        self.assertTrue(is_compressible("a.html", 2000))
+        self.assertFalse(is_compressible("a.html", 10))
+        self.assertFalse(is_compressible("a.png", 2000))
+
+    def test_writes_siblings(self):
+        stats = compress_outputs(self.docs, self.state)
+        self.assertEqual(stats["compressed"], 2)
+        with gzip.open(os.path.join(self.docs, "index.html.gz"), "rt") as file:
+            self.assertEqual(file.read(), "<p>hello</p>" * 200)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "css/site.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "small.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images/a.png.gz")))
+
+    def test_pass_only_runs_when_settings_change(self):
+        compress_outputs(self.docs, self.state)
+        self.write("docs/index.html", "<p>changed</p>" * 200, mtime=0)
+        stats = compress_outputs(self.docs, self.state)
+        self.assertEqual((stats["compressed"], stats["unchanged"]), (0, 0))
+        stats = compress_outputs(self.docs, self.state, min_size=2000)
+        self.assertEqual((stats["compressed"], stats["unchanged"], stats["removed"]), (0, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "css/site.css.gz")))
+
+    def test_stale_sibling_is_refreshed(self):
+        compress_outputs(self.docs, self.state)
+        sibling = os.path.join(self.docs, "index.html.gz")
+        os.utime(sibling, ns=(0, 0))
+        self.write("docs/index.html", "<p>changed</p>" * 200)
+        os.remove(self.state)
+        stats = compress_outputs(self.docs, self.state)
+        self.assertEqual((stats["compressed"], stats["unchanged"]), (1, 1))
+        with gzip.open(sibling, "rt") as file:
+            self.assertEqual(file.read(), "<p>changed</p>" * 200)
+
+    def test_writers_compress_when_active(self):
+        path = os.path.join(self.docs, "index.html")
+        write_if_changed(path, "<p>new</p>" * 200)
+        self.assertFalse(os.path.exists(path + ".gz"))
+        compress.activate((MIN_SIZE, LEVEL))
+        self.addCleanup(compress.activate, None)
+        write_if_changed(path, "<p>new</p>" * 200)
+        with gzip.open(path + ".gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>new</p>" * 200)
+        write_if_changed(path, "<p>short</p>")
+        self.assertFalse(os.path.exists(path + ".gz"))
+
+    def test_removed_outputs_lose_siblings(self):
+        compress_outputs(self.docs, self.state)
+        remove_outputs([os.path.join(self.docs, "index.html")], self.docs)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
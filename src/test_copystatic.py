@@ -0,0 +1,81 @@
+import os
+import unittest
+
+from copystatic import LARGE_FILE_SIZE, batch_copies, sync_files
+from testsupport import TempDirTestCase
+
+class TestSyncFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self.path("static")
+        self.dest = self.path("docs")
+        self.manifest = self.path("static.json")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png")
+        self.write("static/images/a.png:Zone.Identifier", "zone")
+
+    def sync(self, **kwargs):
+        return sync_files(self.source, self.dest, self.manifest, **kwargs)
+
+    def test_first_sync_copies_everything_but_ignored(self):
+        stats = self.sync()
+        self.assertEqual(stats["copied"], 2)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "images/a.png")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images/a.png:Zone.Identifier")))
+
+    def test_second_sync_copies_only_changes(self):
+        self.sync()
+        self.write("static/index.css", "body { color: red }")
+        stats = self.sync()
+        self.assertEqual((stats["copied"], stats["unchanged"]), (1, 1))
+        with open(os.path.join(self.dest, "index.css")) as file:
+            self.assertEqual(file.read(), "body { color: red }")
+
+    def test_hash_check_skips_touched_but_identical_files(self):
+        self.sync()
+        os.utime(os.path.join(self.source, "index.css"), (0, 0))
+        self.assertEqual(self.sync()["copied"], 1)
+        os.utime(os.path.join(self.source, "index.css"), (1, 1))
+        self.assertEqual(self.sync(use_hash=True)["copied"], 0)
+
+    def test_removed_sources_are_pruned_but_other_outputs_kept(self):
+        self.sync()
+        page = self.write("docs/index.html", "<p>page</p>")
+        os.remove(os.path.join(self.source, "images/a.png"))
+        stats = self.sync()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images/a.png")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_hardlink_mode(self):
+        self.sync(link_mode="hardlink")
+        source_stat = os.stat(os.path.join(self.source, "index.css"))
+        dest_stat = os.stat(os.path.join(self.dest, "index.css"))
+        self.assertEqual(source_stat.st_ino, dest_stat.st_ino)
+        self.assertEqual(self.sync(link_mode="hardlink")["copied"], 0)
+
+    def test_parallel_copy_of_large_and_small_files(self):
+        data = os.urandom(LARGE_FILE_SIZE + 12345)
+        with open(os.path.join(self.source, "images/big.png"), "wb") as file:
+            file.write(data)
+        for i in range(20):
+            self.write(f"static/css/{i}.css", f"/* {i} */")
+        stats = self.sync(link_mode="copy", workers=4)
+        self.assertEqual(stats["copied"], 23)
+        self.assertEqual(stats["bytes"], len(data) + 7 + 3 + sum(len(f"/* {i} */") for i in range(20)))
+        with open(os.path.join(self.dest, "images/big.png"), "rb") as file:
+            self.assertEqual(file.read(), data)
+        self.assertEqual(self.sync(workers=4)["copied"], 0)
+
+    def test_batch_copies(self):
+        copies = [("big", "big", LARGE_FILE_SIZE)] + [(str(i), str(i), 10) for i in range(70)]
+        batches = batch_copies(copies)
+        self.assertEqual([len(batch) for batch in batches], [1, 64, 6])
+
+    def test_unknown_link_mode(self):
+        with self.assertRaises(ValueError):
+            self.sync(link_mode="symlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
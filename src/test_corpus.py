@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from bench import compare
+from corpus import CorpusGenerator, CorpusOptions, generate_site
+from markdown_blocks import extract_title, markdown_to_html_node
+from png import decode_png
+
+class TestCorpus(unittest.TestCase):
+    def test_generation_is_deterministic(self):
+        first = CorpusGenerator(CorpusOptions(seed=7))
+        second = CorpusGenerator(CorpusOptions(seed=7))
+        self.assertEqual([first.page(i) for i in range(5)], [second.page(i) for i in range(5)])
+
+    def test_pages_render(self):
+        generator = CorpusGenerator(CorpusOptions(pages=20, link_density=0.5, image_density=0.2))
+        for index in range(20):
+            markdown = generator.page(index)
+            self.assertTrue(extract_title(markdown))
+            html = markdown_to_html_node(markdown).to_html()
+            self.assertIn("<pre><code>", html)
+
+    def test_generate_site_layout(self):
+        with tempfile.TemporaryDirectory() as root:
+            content, static, template_path = generate_site(root, CorpusOptions(pages=30, depth=2, fanout=3))
+            pages = [
+                os.path.join(directory, name)
+                for directory, _, names in os.walk(content) for name in names
+            ]
+            self.assertEqual(len(pages), 30)
+            self.assertTrue(os.path.exists(os.path.join(content, "index.md")))
+            with open(os.path.join(static, "images", "image0.png"), "rb") as file:
+                self.assertEqual(decode_png(file.read())[:2], (640, 400))
+            self.assertTrue(os.path.exists(template_path))
+
+    def test_compare_flags_regressions(self):
+        old = {"micro": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+        new = {"micro": {"a": {"median": 1.05}, "b": {"median": 1.5}, "c": {"median": 1.0}}}
+        rows, regressions = compare(old, new, threshold=0.1)
+        self.assertEqual([row[0] for row in rows], ["a", "b"])
+        self.assertEqual(regressions, ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
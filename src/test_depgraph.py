@@ -0,0 +1,66 @@
+import os
+import unittest
+
+from depgraph import DependencyGraph
+from manifest import plan_build, record_page
+from markdown_blocks import find_pages, generate_page
+from testsupport import TempDirTestCase
+
+class TestDependencyGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "docs")
+        self.template = self.write("template.html", "{{> footer.html }}{{ Content }}")
+        self.post_template = self.write("post.html", "{{> byline.html }}{{ Content }}")
+        self.footer = self.write("footer.html", "<footer></footer>")
+        self.byline = self.write("byline.html", "<p>by me</p>")
+        self.note = self.write("content/_shared/note.md", "A note")
+        self.write("content/index.md", "# Home")
+        self.write("content/a.md", "<!-- template: post.html -->\n# A\n\n{{> _shared/note.md }}")
+        self.write("content/b.md", "<!-- template: post.html -->\n# B")
+        self.manifest = self.build(None)
+
+    def source(self, name):
+        return os.path.join(self.content, name)
+
+    def build(self, manifest):
+        to_render, _, manifest = plan_build(find_pages(self.content, self.public), "/", manifest)
+        self.rendered = sorted(source for source, _ in to_render)
+        for from_path, dest_path in to_render:
+            result = generate_page(from_path, self.template, dest_path, "/")
+            record_page(manifest, from_path, dest_path, result["deps"])
+        return manifest
+
+    def graph(self):
+        graph = DependencyGraph()
+        graph.add_manifest(self.manifest)
+        return graph
+
+    def test_queries(self):
+        graph = self.graph()
+        self.assertEqual(graph.dependents([self.byline]), [self.source("a.md"), self.source("b.md")])
+        self.assertEqual(graph.dependents([self.note]), [self.source("a.md")])
+        self.assertEqual(graph.dependents([os.path.relpath(self.footer)]), [self.source("index.md")])
+        self.assertEqual(
+            graph.dependencies(self.source("a.md")),
+            sorted([self.source("a.md"), self.post_template, self.byline, self.note]),
+        )
+        self.assertEqual(graph.changed(), ([], []))
+        self.write("byline.html", "<p>by someone else</p>")
+        self.assertEqual(graph.changed(), ([self.source("a.md"), self.source("b.md")], [self.byline]))
+
+    def test_changing_a_partial_rebuilds_only_its_pages(self):
+        self.assertEqual(len(self.rendered), 3)
+        self.write("byline.html", "<p>by someone else</p>")
+        self.manifest = self.build(self.manifest)
+        self.assertEqual(self.rendered, [self.source("a.md"), self.source("b.md")])
+        self.write("content/_shared/note.md", "Another note")
+        self.manifest = self.build(self.manifest)
+        self.assertEqual(self.rendered, [self.source("a.md")])
+        self.manifest = self.build(self.manifest)
+        self.assertEqual(self.rendered, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
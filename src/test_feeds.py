@@ -0,0 +1,55 @@
+import os
+import unittest
+
+from feeds import atom_feed, page_date, sitemap_xml
+from siteindex import build_site_index
+from testsupport import TempDirTestCase
+
+class TestFeeds(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        pages = [
+            self.page("index.md", "# Home"),
+            self.page("about.md", "# About & more"),
+            self.page("blog/old/index.md", "<!-- date: 2023-01-02 -->\n<!-- author: Ann -->\n# Old post"),
+            self.page("blog/new/index.md", "<!-- date: 2024-03-04T10:00:00+02:00 -->\n# New post"),
+        ]
+        self.index = build_site_index(pages, self.content)
+
+    def page(self, rel_path, text):
+        path = self.write("content/" + rel_path, text)
+        return (path, os.path.join(self.root, "docs", rel_path.replace(".md", ".html")))
+
+    def test_page_date_uses_metadata(self):
+        entry = self.index["pages"][os.path.join(self.content, "blog/new/index.md")]
+        self.assertEqual(page_date(entry).isoformat(), "2024-03-04T10:00:00+02:00")
+
+    def test_sitemap(self):
+        sitemap = sitemap_xml(self.index, "https://example.com", "/site/")
+        self.assertIn("<loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/site/about.html</loc>", sitemap)
+        self.assertIn(
+            "<loc>https://example.com/site/blog/old/</loc><lastmod>2023-01-02T00:00:00Z</lastmod>",
+            sitemap,
+        )
+
+    def test_feed_lists_section_newest_first(self):
+        feed = atom_feed(self.index, "https://example.com/")
+        self.assertIn("<title>Home</title>", feed)
+        self.assertNotIn("About", feed)
+        self.assertLess(feed.index("New post"), feed.index("Old post"))
+        self.assertIn("<updated>2024-03-04T08:00:00Z</updated>", feed)
+        self.assertIn('<link href="https://example.com/blog/new/"/>', feed)
+
+    def test_feed_authors(self):
+        feed = atom_feed(self.index, "https://example.com/")
+        self.assertIn("  <author><name>Home</name></author>", feed)
+        self.assertIn("    <author><name>Ann</name></author>", feed)
+        self.assertEqual(feed.count("<author>"), 2)
+        feed = atom_feed(self.index, "https://example.com/", author="Bo & Co")
+        self.assertIn("  <author><name>Bo &amp; Co</name></author>", feed)
+
+
+if __name__ == "__main__":
+    unittest.main()
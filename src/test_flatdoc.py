@@ -0,0 +1,75 @@
+import unittest
+
+from blockcache import BlockCache
+from flatdoc import IMAGE_KEYS, LINK_KEYS, FlatDocument, markdown_to_flat_document
+from htmlnode import LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+
+MIXED = """
+# Main Heading
+
+This is a paragraph with **bold**, _italic_, `code` and a [link](/blog).
+
+![image](/images/a.png)
+
+> Here's a quote
+> over two lines
+
+```
+code block
+```
+
+- List item 1
+- List item 2
+
+1. First
+2. Second
+"""
+
+class TestFlatDocument(unittest.TestCase):
+    def test_to_node_round_trip(self):
+        document = markdown_to_flat_document(MIXED)
+        node = document.to_node()
+        self.assertEqual(node.tag, "div")
+        self.assertEqual(node.to_html(), document.to_html())
+        self.assertEqual(FlatDocument.from_node(node).to_html(), document.to_html())
+        self.assertEqual(markdown_to_html_node(MIXED).to_html(), document.to_html())
+
+    def test_link_and_image_keys_are_shared(self):
+        document = markdown_to_flat_document("[a](/a) [b](/b) ![c](/c.png)")
+        self.assertEqual([keys for keys, _ in document.props], [LINK_KEYS, LINK_KEYS, IMAGE_KEYS])
+        self.assertTrue(all(keys is LINK_KEYS for keys, _ in document.props[:2]))
+
+    def test_empty_document(self):
+        self.assertEqual(markdown_to_flat_document("").to_html(), "<div></div>")
+
+    def test_from_node(self):
+        node = ParentNode(
+            "div",
+            [ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, "Normal")]), LeafNode("a", "x", {"href": "/"})],
+        )
+        document = FlatDocument.from_node(node)
+        self.assertEqual(len(document), 5)
+        self.assertEqual(document.to_html(), node.to_html())
+
+    def test_builder_errors(self):
+        document = FlatDocument()
+        with self.assertRaises(ValueError):
+            document.open(None)
+        with self.assertRaises(ValueError):
+            document.leaf("p", None)
+        document.open("div")
+        with self.assertRaises(ValueError):
+            document.to_html()
+
+    def test_block_cache(self):
+        md = "# Title\n\n" + "A long paragraph with a [link](/x). " * 10
+        cache = BlockCache()
+        markdown_to_flat_document(md, cache)
+        html = markdown_to_flat_document(md, cache).to_html()
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import unittest
+
+from images import ImageCatalog
+from png import decode_png, encode_png
+from testsupport import TempDirTestCase
+
+class TestImages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "docs")
+        self.cache = os.path.join(self.root, ".cache")
+        self.write_png("images/a.png", 40, 20)
+        self.write("static/images/notes.txt", b"not an image")
+
+    def write_png(self, rel_path, width, height, shade=0):
+        rows = [bytes((x + y + shade) % 256 for x in range(width) for _ in range(3)) for y in range(height)]
+        return self.write(os.path.join("static", rel_path), encode_png(width, height, 3, rows))
+
+    def catalog(self, widths=()):
+        catalog = ImageCatalog(self.static, self.public, self.cache, widths)
+        return catalog, catalog.refresh()
+
+    def test_dimensions_and_lazy_loading(self):
+        catalog, stats = self.catalog()
+        self.assertEqual(stats["processed"], 1)
+        html = catalog.rewrite('<p><img src="/images/a.png" alt="A"></img><img src="/x.png" alt=""></img></p>')
+        self.assertEqual(
+            html,
+            '<p><img src="/images/a.png" width="40" height="20" loading="lazy" alt="A"></img>'
+            '<img src="/x.png" loading="lazy" alt=""></img></p>',
+        )
+
+    def test_variants_and_srcset(self):
+        catalog, _ = self.catalog((10, 20, 80))
+        variant = os.path.join(self.public, "images", "a-10w.png")
+        with open(variant, "rb") as file:
+            self.assertEqual(decode_png(file.read())[:2], (10, 5))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "images", "a-20w.png")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "a-80w.png")))
+        html = catalog.rewrite('<img src="/images/a.png" alt="A">', "/site/")
+        self.assertIn('srcset="/site/images/a-10w.png 10w, /site/images/a-20w.png 20w, /site/images/a.png 40w"', html)
+        self.assertIn('sizes="(max-width: 40px) 100vw, 40px"', html)
+
+    def test_unchanged_images_are_not_reprocessed(self):
+        self.catalog((10,))
+        os.remove(os.path.join(self.public, "images", "a-10w.png"))
+        catalog, stats = self.catalog((10,))
+        self.assertEqual(stats["processed"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "images", "a-10w.png")))
+        catalog, stats = self.catalog((10,))
+        self.assertEqual((stats["processed"], stats["unchanged"]), (0, 1))
+
+    def test_variant_cache_is_shared(self):
+        # A second output reuses the cached variant instead of resizing again.
+        variants = os.path.join(self.root, "variants")
+        catalog = ImageCatalog(self.static, self.public, self.cache, (10,), variant_dir=variants)
+        catalog.refresh()
+        digest = catalog.images["/images/a.png"]["hash"]
+        marker = encode_png(10, 5, 3, [bytes(30)] * 5)
+        self.write(catalog.variant_cache_path(digest, 10), marker)
+        other = ImageCatalog(self.static, self.path("other"), self.path("other-cache"), (10,),
+                             variant_dir=variants)
+        other.refresh()
+        with open(self.path("other/images/a-10w.png"), "rb") as file:
+            self.assertEqual(file.read(), marker)
+
+    def test_removed_image_variants_are_pruned(self):
+        self.catalog((10,))
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        catalog, stats = self.catalog((10,))
+        self.assertEqual(stats["removed"], 1)
+        self.assertEqual(catalog.images, {})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "a-10w.png")))
+
+    def test_dependencies(self):
+        catalog, _ = self.catalog()
+        markdown = "![A](/images/a.png) ![B](/images/missing.png) [link](/images/a.png)"
+        self.assertEqual(catalog.dependencies(markdown), [os.path.join(self.static, "images/a.png")])
+
+
+if __name__ == "__main__":
+    unittest.main()
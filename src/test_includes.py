@@ -0,0 +1,50 @@
+import os
+import unittest
+
+from includes import expand_includes, include_lines
+from markdown_blocks import find_pages, generate_page
+from testsupport import TempDirTestCase
+
+class TestIncludes(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.page = self.write("content/page.md", "# Page\n\n{{> _shared/note.md }}\n\nAfter")
+        self.note = self.write("content/_shared/note.md", "A **note**\n\n  {{> sign.md }}  \n")
+        self.sign = self.write("content/_shared/sign.md", "Signed")
+
+    def test_expand_includes(self):
+        with open(self.page) as file:
+            markdown, deps = expand_includes(file.read(), self.page)
+        self.assertEqual(markdown, "# Page\n\nA **note**\n\nSigned\n\nAfter")
+        self.assertEqual(deps, [self.note, self.sign])
+        self.assertEqual(expand_includes("no includes", self.page), ("no includes", []))
+
+    def test_include_lines_keep_line_endings(self):
+        with open(self.page) as file:
+            lines = list(include_lines(file, self.page, []))
+        self.assertEqual(lines[2:5], ["A **note**\n", "\n", "Signed\n"])
+        self.assertEqual(lines[-1], "After")
+
+    def test_fenced_includes_are_left_alone(self):
+        markdown = "# Docs\n\n```\n{{> footer.md }}\n\n{{> footer.md }}\n```\n\n{{> _shared/sign.md }}"
+        expanded, deps = expand_includes(markdown, self.page)
+        self.assertEqual(expanded, markdown.replace("{{> _shared/sign.md }}", "Signed"))
+        self.assertEqual(deps, [self.sign])
+
+    def test_include_errors(self):
+        self.write("content/_shared/sign.md", "{{> note.md }}")
+        with self.assertRaisesRegex(ValueError, "includes itself"):
+            expand_includes("{{> _shared/note.md }}", self.page)
+        with self.assertRaisesRegex(ValueError, "not found"):
+            expand_includes("{{> _shared/missing.md }}", self.page)
+
+    def test_includes_are_not_pages_but_are_dependencies(self):
+        template = self.write("template.html", "{{ Content }}")
+        self.assertEqual([source for source, _ in find_pages(self.content, "docs")], [self.page])
+        result = generate_page(self.page, template, os.path.join(self.root, "docs/page.html"), "/")
+        self.assertEqual(result["deps"], [self.page, template, self.note, self.sign])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import unittest
+
+import loader
+from loader import ContentBundle, decode_source, load_bundle, read_bytes, read_text, scan_sources, write_bundle
+from manifest import hash_file
+from testsupport import TempDirTestCase
+
+class TestLoader(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.bundle_path = os.path.join(self.root, "cache", "content.bundle")
+        for rel_path in ("b.md", "a/z.md", "a/index.md", "c/d/e.md", "notes.txt"):
+            self.write("content/" + rel_path, f"# {rel_path}\n")
+
+    def tearDown(self):
+        loader.activate(None)
+        super().tearDown()
+
+    def paths(self, sources):
+        return [os.path.relpath(path, self.content) for path, _ in sources]
+
+    def test_scan_sources_order_and_stats(self):
+        sources = scan_sources(self.content)
+        self.assertEqual(self.paths(sources), ["a/index.md", "a/z.md", "b.md", "c/d/e.md"])
+        self.assertEqual(sources[2][1].st_size, len("# b.md\n"))
+
+    def test_read_text_matches_text_mode(self):
+        path = self.write("content/crlf.md", "# Title\r\n\r\nline\rend\n")
+        with open(path) as file:
+            self.assertEqual(read_text(path), file.read())
+        big = self.write("content/big.md", "word " * (loader.MMAP_THRESHOLD // 4))
+        with open(big, "rb") as file:
+            self.assertEqual(read_bytes(big), file.read())
+        with open(big) as file:
+            self.assertEqual(read_text(big), file.read())
+        self.assertEqual(decode_source("café".encode("utf-8")), "café")
+
+    def test_bundle_round_trip(self):
+        sources = scan_sources(self.content)
+        write_bundle(self.bundle_path, self.content, sources)
+        bundle = load_bundle(self.bundle_path, self.content)
+        bundle.validate(sources)
+        self.assertFalse(bundle.stale(sources))
+        path = sources[0][0]
+        self.assertEqual(bundle.get(path), b"# a/index.md\n")
+        self.assertEqual(bundle.hashes()[path], hash_file(path))
+        self.assertIsNone(load_bundle(self.bundle_path, "elsewhere"))
+
+    def test_changed_sources_are_read_from_disk(self):
+        write_bundle(self.bundle_path, self.content, scan_sources(self.content))
+        changed = self.write("content/b.md", "# changed and longer\n")
+        self.write("content/new.md", "# new\n")
+        sources = scan_sources(self.content)
+        bundle = load_bundle(self.bundle_path)
+        bundle.validate(sources)
+        self.assertTrue(bundle.stale(sources))
+        self.assertIsNone(bundle.get(changed))
+        self.assertNotIn(changed, bundle.hashes())
+        loader.activate(bundle)
+        self.assertEqual(read_text(changed), "# changed and longer\n")
+        write_bundle(self.bundle_path, self.content, sources, bundle)
+        refreshed = load_bundle(self.bundle_path)
+        self.assertFalse(refreshed.stale(sources))
+        self.assertEqual(refreshed.get(changed), b"# changed and longer\n")
+
+    def test_bundle_is_used_when_fresh(self):
+        sources = scan_sources(self.content)
+        write_bundle(self.bundle_path, self.content, sources)
+        bundle = load_bundle(self.bundle_path)
+        # An unvalidated bundle checks each file's stat on first use.
+        self.assertTrue(bundle.is_fresh(sources[0][0]))
+        bundle.entries[sources[0][0]][2] += 1
+        self.assertFalse(ContentBundle(self.content, bundle.entries, bundle.data).is_fresh(sources[0][0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import gzip
+import json
+import os
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+
+from main import apply_config, main, make_parser, normalize_argv, parse_args
+from testsupport import TempDirTestCase
+
+class TestMain(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\n[About](/about.html)")
+        self.write("content/about.md", "# About\n\n![Tom](/images/tom.png)")
+        self.write("static/index.css", "body {}")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+
+    def paths(self, *args):
+        return list(args) + [
+            "--content", self.path("content"),
+            "--static", self.path("static"),
+            "--output", self.path("docs"),
+            "--template", self.path("template.html"),
+            "--cache-dir", self.path(".cache"),
+            "-q",
+        ]
+
+    def test_legacy_command_lines(self):
+        self.assertEqual(normalize_argv([]), ["build"])
+        self.assertEqual(normalize_argv(["/site/", "--jobs", "2"]), ["build", "/site/", "--jobs", "2"])
+        self.assertEqual(normalize_argv(["--serve", "--port", "8000"]), ["serve", "--port", "8000"])
+        self.assertEqual(normalize_argv(["/site/", "--watch"]), ["watch", "/site/"])
+        self.assertEqual(normalize_argv(["clean"]), ["clean"])
+
+    def test_config_file_sets_defaults(self):
+        config = self.write("site.json", json.dumps({
+            "jobs": 4,
+            "site-url": "https://example.com",
+            "image-widths": [320],
+            "targets": ["/=public", {"basepath": "/b/", "output": "b"}],
+        }))
+        args = parse_args(["build", "--config", config, "--jobs", "2"])
+        self.assertEqual(args.jobs, 2)
+        self.assertEqual(args.site_url, "https://example.com")
+        self.assertEqual(args.image_widths, (320,))
+        self.assertEqual(
+            args.target, [{"basepath": "/", "output": "public"}, {"basepath": "/b/", "output": "b"}]
+        )
+
+    def test_config_file_rejects_unknown_options(self):
+        config = self.write("site.json", json.dumps({"jbos": 4}))
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit):
+            parse_args(["build", "--config", config])
+
+    def test_config_file_keys_of_other_commands(self):
+        # "port" is only for serve, but one file serves every command.
+        config = self.write("site.json", json.dumps({"port": 9000, "site-url": "https://example.com"}))
+        self.assertEqual(parse_args(["serve", "--config", config]).port, 9000)
+        self.assertEqual(parse_args(["build", "--config", config]).site_url, "https://example.com")
+        parser, subparsers = make_parser()
+        with redirect_stderr(StringIO()), self.assertRaises(SystemExit):
+            apply_config(subparsers["build"], {"port": 9000})
+
+    def test_build_several_targets(self):
+        main(self.paths("build", "/site/", "--target", f"/={self.path('root')}"))
+        self.assertIn('href="/site/about.html"', self.read("docs/index.html"))
+        self.assertIn('href="/about.html"', self.read("root/index.html"))
+        self.assertEqual(self.read("root/index.css"), "body {}")
+        self.assertTrue(os.path.exists(self.path(".cache/manifest.json")))
+        [state_dir] = os.listdir(self.path(".cache/targets"))
+        self.assertTrue(os.path.exists(self.path(f".cache/targets/{state_dir}/manifest.json")))
+
+        main(self.paths("clean", "--target", f"/={self.path('root')}"))
+        for rel_path in ("docs", "root", ".cache"):
+            self.assertFalse(os.path.exists(self.path(rel_path)))
+
+    def test_search_index_catches_up_with_edits(self):
+        main(self.paths("build", "--incremental", "--search-index"))
+        self.write("content/about.md", "# About\n\nzebraword")
+        main(self.paths("build", "--incremental"))
+        main(self.paths("build", "--incremental", "--search-index"))
+        with gzip.open(self.path("docs/search.json.gz"), "rt") as file:
+            self.assertIn("zebraword", json.load(file)["terms"])
+
+    def test_targets_need_distinct_outputs(self):
+        with self.assertRaises(SystemExit):
+            main(self.paths("build", "--target", f"/b/={self.path('docs')}"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import unittest
+
+from blocktypes import PARSER_VERSION
+from manifest import GENERATOR_VERSION, plan_build, record_page, remove_outputs
+from testsupport import TempDirTestCase
+
+class TestManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", "<p>{{ Content }}</p>")
+        self.pages = [
+            (self.write("content/a.md", "# A"), os.path.join(self.root, "docs/a.html")),
+            (self.write("content/b.md", "# B"), os.path.join(self.root, "docs/b.html")),
+        ]
+
+    def built_manifest(self):
+        to_render, _, manifest = plan_build(self.pages, "/", None)
+        for from_path, dest_path in to_render:
+            self.write(os.path.relpath(dest_path, self.root), "html")
+            record_page(manifest, from_path, dest_path, [from_path, self.template])
+        return manifest
+
+    def test_first_build_renders_everything(self):
+        to_render, stale, manifest = plan_build(self.pages, "/", None)
+        self.assertEqual(to_render, self.pages)
+        self.assertEqual(stale, [])
+        self.assertEqual(manifest["version"], GENERATOR_VERSION)
+
+    def test_manifest_from_an_older_parser_rebuilds_everything(self):
+        manifest = self.built_manifest()
+        manifest["version"] = "1"
+        self.assertTrue(GENERATOR_VERSION.endswith("." + PARSER_VERSION))
+        to_render, _, _ = plan_build(self.pages, "/", manifest)
+        self.assertEqual(to_render, self.pages)
+
+    def test_unchanged_pages_are_skipped(self):
+        manifest = self.built_manifest()
+        to_render, stale, _ = plan_build(self.pages, "/", manifest)
+        self.assertEqual(to_render, [])
+        self.assertEqual(stale, [])
+
+    def test_changed_source_is_rendered(self):
+        manifest = self.built_manifest()
+        self.write("content/b.md", "# B changed")
+        to_render, _, _ = plan_build(self.pages, "/", manifest)
+        self.assertEqual(to_render, [self.pages[1]])
+
+    def test_missing_output_is_rendered(self):
+        manifest = self.built_manifest()
+        os.remove(self.pages[0][1])
+        to_render, _, _ = plan_build(self.pages, "/", manifest)
+        self.assertEqual(to_render, [self.pages[0]])
+
+    def test_template_change_rebuilds_everything(self):
+        manifest = self.built_manifest()
+        self.write("template.html", "<div>{{ Content }}</div>")
+        to_render, _, _ = plan_build(self.pages, "/", manifest)
+        self.assertEqual(to_render, self.pages)
+
+    def test_basepath_or_version_change_rebuilds_everything(self):
+        manifest = self.built_manifest()
+        to_render, _, _ = plan_build(self.pages, "/site/", manifest)
+        self.assertEqual(to_render, self.pages)
+        manifest["version"] = "0"
+        to_render, _, _ = plan_build(self.pages, "/", manifest)
+        self.assertEqual(to_render, self.pages)
+
+    def test_settings_change_or_force_rebuilds_everything(self):
+        manifest = self.built_manifest()
+        to_render, _, new = plan_build(self.pages, "/", manifest, settings={"minify": True})
+        self.assertEqual(to_render, self.pages)
+        self.assertEqual(new["settings"], {"minify": True})
+        to_render, stale, _ = plan_build(self.pages[:1], "/", manifest, force=True)
+        self.assertEqual(to_render, self.pages[:1])
+        self.assertEqual(stale, [self.pages[1][1]])
+
+    def test_deleted_source_output_is_stale(self):
+        manifest = self.built_manifest()
+        _, stale, _ = plan_build(self.pages[:1], "/", manifest)
+        self.assertEqual(stale, [self.pages[1][1]])
+        remove_outputs(stale, os.path.join(self.root, "docs"))
+        self.assertFalse(os.path.exists(self.pages[1][1]))
+        self.assertTrue(os.path.exists(self.pages[0][1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
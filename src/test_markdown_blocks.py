@@ -1,6 +1,7 @@
 import unittest
 
 from textnode import TextNode, TextType
+from blocktypes import Block, scan_blocks
 from markdown_blocks import BlockType, block_to_block_type, markdown_to_html_node, extract_title
 
 class TestUtility(unittest.TestCase):
@@ -154,6 +155,36 @@ class TestUtility(unittest.TestCase):
         html = node.to_html()
         self.assertEqual(html, "<div></div>")
 
+    def test_scan_blocks_types_and_lines(self):
+        md = "# Title\n\n  para one\n  para two  \n\n- a\n- b\n\n1. x\n2. y"
+        self.assertEqual(
+            list(scan_blocks(md.split("\n"))),
+            [
+                Block(BlockType.HEADING, ["# Title"]),
+                Block(BlockType.PARAGRAPH, ["para one", "para two"]),
+                Block(BlockType.ULIST, ["- a", "- b"]),
+                Block(BlockType.OLIST, ["1. x", "2. y"]),
+            ],
+        )
+
+    def test_codeblock_with_blank_lines(self):
+        md = "```\nfirst\n\nsecond\n```\n\nafter"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>first\n\nsecond\n</code></pre><p>after</p></div>",
+        )
+
+    def test_unclosed_fence_is_not_code(self):
+        blocks = list(scan_blocks("```\nnot code\n\nstill text".split("\n")))
+        self.assertEqual(
+            blocks,
+            [
+                Block(BlockType.PARAGRAPH, ["```", "not code"]),
+                Block(BlockType.PARAGRAPH, ["still text"]),
+            ],
+        )
+
     def test_title_extraction(self):
         md = "# Hello"
         extracted_title = extract_title(md)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from output import minify_html, replace_if_changed, write_if_changed
+
+class TestOutput(unittest.TestCase):
+    def test_write_if_changed_keeps_identical_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.html")
+            self.assertTrue(write_if_changed(path, "<p>one</p>"))
+            os.utime(path, ns=(0, 0))
+            self.assertFalse(write_if_changed(path, "<p>one</p>"))
+            self.assertEqual(os.stat(path).st_mtime_ns, 0)
+            self.assertTrue(write_if_changed(path, b"<p>two</p>"))
+            with open(path) as file:
+                self.assertEqual(file.read(), "<p>two</p>")
+            self.assertEqual(os.listdir(root), ["page.html"])
+
+    def test_replace_if_changed_keeps_identical_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.html")
+            tmp_path = path + ".tmp"
+            for text, replaced in (("a" * 5000, True), ("a" * 5000, False), ("a" * 4999 + "b", True)):
+                with open(tmp_path, "w") as file:
+                    file.write(text)
+                if os.path.exists(path):
+                    os.utime(path, ns=(0, 0))
+                self.assertEqual(replace_if_changed(tmp_path, path), replaced)
+                self.assertEqual(os.listdir(root), ["page.html"])
+            self.assertNotEqual(os.stat(path).st_mtime_ns, 0)
+            with open(path) as file:
+                self.assertEqual(file.read()[-2:], "ab")
+
+    def test_minify_collapses_whitespace(self):
+        html = "<!doctype html>\n<html>\n  <head>\n    <title> Hi </title>\n  </head>\n  <body>\n    <p>a  <b>bold</b>\n  text</p>\n  </body>\n</html>\n"
+        self.assertEqual(
+            minify_html(html),
+            "<!doctype html><html><head><title>Hi</title></head><body><p>a <b>bold</b> text</p></body></html>",
+        )
+
+    def test_minify_removes_comments(self):
+        self.assertEqual(minify_html("<p>a</p> <!-- note -->\n<p>b</p>"), "<p>a</p><p>b</p>")
+        self.assertEqual(minify_html("<!--[if IE]>x<![endif]-->"), "<!--[if IE]>x<![endif]-->")
+
+    def test_minify_preserves_pre_and_script(self):
+        html = "<div>\n<pre><code>line 1\n    line 2\n</code></pre>\n<script>\nvar a  = 1;\n</script>\n</div>"
+        self.assertEqual(
+            minify_html(html),
+            "<div><pre><code>line 1\n    line 2\n</code></pre> <script>\nvar a  = 1;\n</script></div>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import unittest
+
+from parallel import generate_pages_parallel, make_batches
+from testsupport import TempDirTestCase
+
+class TestParallel(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+
+    def test_make_batches_covers_all_pages(self):
+        pages = [(f"{i}.md", f"{i}.html") for i in range(10)]
+        batches = make_batches(pages, 2, batch_size=3)
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 3, 1])
+        self.assertEqual([page for batch in batches for page in batch], pages)
+
+    def test_parallel_output_matches_serial(self):
+        sources = [self.write(f"content/{i}.md", f"# Page {i}\n\n[home](/) **{i}**") for i in range(6)]
+        serial = [(path, path.replace("content", "serial").replace(".md", ".html")) for path in sources]
+        parallel = [(path, path.replace("content", "parallel").replace(".md", ".html")) for path in sources]
+        generate_pages_parallel(serial, self.template, "/site/", 1)
+        generate_pages_parallel(parallel, self.template, "/site/", 3, batch_size=1)
+        for (_, serial_dest), (_, parallel_dest) in zip(serial, parallel):
+            self.assertEqual(self.read(serial_dest), self.read(parallel_dest))
+
+    def test_results_carry_title_and_terms(self):
+        source = self.write("content/a.md", "# Ring\n\nThe ring and the _road_")
+        pages = [(source, os.path.join(self.root, "docs/a.html"))]
+        result = generate_pages_parallel(pages, self.template, "/", 1, index_text=True)[0]
+        self.assertEqual(result["title"], "Ring")
+        self.assertEqual(result["terms"], {"ring": 2, "the": 2, "and": 1, "road": 1})
+
+    def test_error_reports_source_file(self):
+        good = self.write("content/good.md", "# Good")
+        bad = self.write("content/bad.md", "no title here")
+        pages = [
+            (good, os.path.join(self.root, "docs/good.html")),
+            (bad, os.path.join(self.root, "docs/bad.html")),
+        ]
+        with self.assertRaises(Exception) as context:
+            generate_pages_parallel(pages, self.template, "/", 2, batch_size=1)
+        self.assertIn(bad, str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import unittest
+
+from markdown_blocks import find_pages
+from parallel import generate_pages_parallel
+from pipeline import generate_pages_pipelined
+from testsupport import TempDirTestCase
+
+class TestPipeline(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.template = self.write("template.html", '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}')
+        for i in range(12):
+            self.write(f"content/dir{i % 3}/page{i}.md", f"# Page {i}\n\nLink to [next](/page{i + 1}) and **bold**.")
+
+    def read_tree(self, root):
+        tree = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                with open(path) as file:
+                    tree[os.path.relpath(path, root)] = file.read()
+        return tree
+
+    def test_matches_serial_output(self):
+        serial = os.path.join(self.root, "serial")
+        piped = os.path.join(self.root, "piped")
+        generate_pages_parallel(find_pages(self.content, serial), self.template, "/site/", 1)
+        results = generate_pages_pipelined(
+            find_pages(self.content, piped), self.template, "/site/", readers=2, writers=2, window=3
+        )
+        self.assertEqual(len(results), 12)
+        self.assertEqual(self.read_tree(serial), self.read_tree(piped))
+
+    def test_error_reports_source_file(self):
+        bad = self.write("content/bad.md", "no title")
+        with self.assertRaises(Exception) as context:
+            generate_pages_pipelined(find_pages(self.content, os.path.join(self.root, "out")), self.template, "/")
+        self.assertIn(bad, str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
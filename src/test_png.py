@@ -0,0 +1,71 @@
+import struct
+import unittest
+import zlib
+
+from png import decode_png, encode_png, png_size, resize
+
+def paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+def filtered_png(width, rows, channels, color_type, filter_type, extra_chunks=()):
+    # Builds a PNG whose rows all use filter_type, to exercise the decoder.
+    raw = bytearray()
+    previous = bytes(width * channels)
+    for row in rows:
+        line = bytearray()
+        for x, value in enumerate(row):
+            a = row[x - channels] if x >= channels else 0
+            b = previous[x]
+            c = previous[x - channels] if x >= channels else 0
+            predictor = [0, a, b, (a + b) >> 1, paeth(a, b, c)][filter_type]
+            line.append((value - predictor) & 0xFF)
+        raw.append(filter_type)
+        raw.extend(line)
+        previous = row
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    header = struct.pack(">IIBBBBB", width, len(rows), 8, color_type, 0, 0, 0)
+    body = b"".join(chunk(kind, data) for kind, data in extra_chunks)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + body
+            + chunk(b"IDAT", zlib.compress(bytes(raw))) + chunk(b"IEND", b""))
+
+class TestPng(unittest.TestCase):
+    rows = [bytes((x * 37 + y * 11 + c * 5) % 256 for x in range(4) for c in range(3)) for y in range(3)]
+
+    def test_png_size(self):
+        data = filtered_png(4, self.rows, 3, 2, 0)
+        self.assertEqual(png_size(data[:24]), (4, 3))
+        with self.assertRaises(ValueError):
+            png_size(b"GIF89a" + bytes(18))
+
+    def test_decode_every_filter_type(self):
+        for filter_type in range(5):
+            data = filtered_png(4, self.rows, 3, 2, filter_type)
+            self.assertEqual(decode_png(data), (4, 3, 3, self.rows), filter_type)
+
+    def test_decode_palette_with_transparency(self):
+        rows = [bytes([0, 1]), bytes([1, 0])]
+        palette = (b"PLTE", bytes([255, 0, 0, 0, 0, 255]))
+        alpha = (b"tRNS", bytes([128]))
+        data = filtered_png(2, rows, 1, 3, 0, [palette, alpha])
+        width, height, channels, decoded = decode_png(data)
+        self.assertEqual((width, height, channels), (2, 2, 4))
+        self.assertEqual(decoded[0], bytes([255, 0, 0, 128, 0, 0, 255, 255]))
+
+    def test_encode_round_trip(self):
+        data = encode_png(4, 3, 3, self.rows)
+        self.assertEqual(decode_png(data), (4, 3, 3, self.rows))
+
+    def test_resize_averages_pixels(self):
+        rows = [bytes([0, 100, 200, 40]), bytes([20, 100, 0, 40])]
+        self.assertEqual(resize(4, 2, 1, rows, 2), (2, 1, [bytes([55, 70])]))
+
+
+if __name__ == "__main__":
+    unittest.main()
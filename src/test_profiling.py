@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+from markdown_blocks import generate_page
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+
+    def test_stage_is_noop_when_disabled(self):
+        with profiling.stage("read"):
+            pass
+        self.assertIsNone(profiling.active())
+
+    def test_stage_totals_and_merge(self):
+        profiler = profiling.enable()
+        with profiling.stage("read"):
+            pass
+        with profiling.stage("read"):
+            pass
+        profiler.merge({"stages": {"read": [1.0, 0.5, 3]}, "pages": [["a.md", 0.2]]})
+        wall, cpu, calls = profiler.stages["read"]
+        self.assertEqual(calls, 5)
+        self.assertGreaterEqual(wall, 1.0)
+        self.assertEqual(profiler.pages, [("a.md", 0.2)])
+
+    def test_stages_from_threads_are_all_counted(self):
+        profiler = profiling.enable()
+
+        def record(_):
+            for _ in range(1000):
+                with profiling.stage("write"):
+                    pass
+                profiler.add_page("a.md", 0.0)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(record, range(8)))
+        self.assertEqual(profiler.stages["write"][2], 8000)
+        self.assertEqual(len(profiler.pages), 8000)
+
+    def test_report_orders_stages_and_pages(self):
+        profiler = profiling.enable()
+        profiler.add_stage("write", 0.1, 0.1)
+        profiler.add_stage("read", 0.1, 0.1)
+        for i in range(5):
+            profiler.add_page(f"{i}.md", i)
+        report = profiler.report(top=2)
+        self.assertEqual([entry["stage"] for entry in report["stages"]], ["read", "write"])
+        self.assertEqual([entry["source"] for entry in report["slowest_pages"]], ["4.md", "3.md"])
+        self.assertIn("Slowest pages:", profiling.format_report(report))
+
+    def test_generate_page_records_stages(self):
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "index.md")
+            template = os.path.join(root, "template.html")
+            with open(source, "w") as file:
+                file.write("# Title\n\nSome **text**")
+            with open(template, "w") as file:
+                file.write("{{ Content }}")
+            profiler = profiling.enable()
+            generate_page(source, template, os.path.join(root, "index.html"), "/")
+            with open(os.path.join(root, "index.html")) as file:
+                self.assertEqual(file.read(), "<div><h1>Title</h1><p>Some <b>text</b></p></div>")
+            for name in ("read", "block split", "inline parse", "html serialize", "template", "write"):
+                self.assertIn(name, profiler.stages)
+            report_path = os.path.join(root, "profile.json")
+            profiler.write_report(report_path)
+            with open(report_path) as file:
+                self.assertEqual(json.load(file)["pages"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
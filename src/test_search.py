@@ -0,0 +1,85 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from blockcache import BlockCache
+from markdown_blocks import generate_page
+from search import SearchIndex, load_search_index, page_terms, save_search_index, tokenize, write_search_index
+
+class TestSearch(unittest.TestCase):
+    def build(self):
+        index = SearchIndex()
+        index.add_page("a.md", "/a.html", "A", page_terms("The ring, the RING and a road"))
+        index.add_page("b.md", "/b/", "B", page_terms("A road to the mountain"))
+        return index
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Old Tom's `code_block`, 2x!"), ["old", "tom", "code", "block", "2x"])
+
+    def test_postings(self):
+        index = self.build()
+        self.assertEqual(index.postings["road"], {"a.md": 1, "b.md": 1})
+        self.assertEqual(index.postings["ring"], {"a.md": 2})
+        self.assertEqual(index.search("ring road"), ["a.md", "b.md"])
+
+    def test_update_replaces_old_terms(self):
+        index = self.build()
+        index.add_page("a.md", "/a.html", "A", page_terms("mountain"))
+        self.assertNotIn("ring", index.postings)
+        self.assertEqual(index.postings["road"], {"b.md": 1})
+        index.retain(["a.md"])
+        self.assertEqual(index.postings, {"mountain": {"a.md": 1}})
+
+    def test_is_current_compares_digests(self):
+        index = SearchIndex()
+        index.add_page("a.md", "/a.html", "A", page_terms("ring"), {"a.md": "1"})
+        self.assertTrue(index.is_current("a.md", {"a.md": "1"}))
+        self.assertFalse(index.is_current("a.md", {"a.md": "2"}))
+        self.assertFalse(index.is_current("b.md", {"b.md": "1"}))
+
+    def test_compact_delta_encodes_documents(self):
+        compact = self.build().compact("/site/")
+        self.assertEqual(compact["docs"], [["/site/a.html", "A"], ["/site/b/", "B"]])
+        self.assertEqual(compact["terms"]["road"], [0, 1, 1, 1])
+        self.assertEqual(compact["terms"]["mountain"], [1, 1])
+
+    def test_state_round_trip_and_output(self):
+        with tempfile.TemporaryDirectory() as root:
+            state_path = os.path.join(root, "cache", "search.json")
+            save_search_index(state_path, self.build())
+            index = load_search_index(state_path)
+            self.assertEqual(index.search("mountain"), ["b.md"])
+            output = os.path.join(root, "search.json.gz")
+            write_search_index(output, index)
+            with open(output, "rb") as file:
+                data = file.read()
+            self.assertEqual(json.loads(gzip.decompress(data)), index.compact())
+            write_search_index(output, self.build())
+            with open(output, "rb") as file:
+                self.assertEqual(file.read(), data)
+
+    def test_block_cache_keeps_terms(self):
+        markdown = "# Title\n\n" + "\n\n".join([
+            "\n".join(f"- item {i} with a [link](/about.html)" for i in range(20)),
+            "\n".join(f"> quoted **line** {i}" for i in range(20)),
+        ])
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "page.md")
+            template = os.path.join(root, "template.html")
+            for path, text in ((source, markdown), (template, "{{ Content }}")):
+                with open(path, "w") as file:
+                    file.write(text)
+            dest = os.path.join(root, "page.html")
+            uncached = generate_page(source, template, dest, "/", index_text=True)["terms"]
+            cache = BlockCache()
+            for _ in range(2):
+                result = generate_page(source, template, dest, "/", cache, index_text=True)
+                self.assertEqual(result["terms"], uncached)
+            self.assertGreater(cache.hits, 0)
+            self.assertNotIn("href", uncached)
+
+
+if __name__ == "__main__":
+    unittest.main()
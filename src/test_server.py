@@ -0,0 +1,81 @@
+import os
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from server import DevServer
+from testsupport import TempDirTestCase
+
+class TestDevServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post/index.md", "# Post\n\n[Home](/)")
+        self.write("static/index.css", "body {}")
+        self.start("/")
+
+    def tearDown(self):
+        self.stop()
+        super().tearDown()
+
+    def start(self, basepath):
+        self.server = DevServer(("127.0.0.1", 0), self.content, self.static, self.template, basepath)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self.thread.start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path, headers=None):
+        request = urllib.request.Request(self.base + path, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, ""
+
+    def test_pages_render_on_demand(self):
+        self.assertEqual(self.get("/")[2], "<title>Home</title><div><h1>Home</h1></div>")
+        self.assertIn("<h1>Post</h1>", self.get("/blog/post")[2])
+        self.assertEqual(self.get("/blog/post/index.html")[0], 200)
+
+    def test_page_cache_is_invalidated_on_change(self):
+        self.get("/")
+        self.write("content/index.md", "# Changed", mtime=1)
+        self.assertIn("<h1>Changed</h1>", self.get("/")[2])
+
+    def test_static_conditional_requests(self):
+        status, headers, body = self.get("/index.css")
+        self.assertEqual((status, body), (200, "body {}"))
+        self.assertIn("Last-Modified", headers)
+        self.assertEqual(self.get("/index.css", {"If-None-Match": headers["ETag"]})[0], 304)
+        self.assertEqual(self.get("/index.css", {"If-Modified-Since": headers["Last-Modified"]})[0], 304)
+
+    def test_page_etag(self):
+        _, headers, _ = self.get("/")
+        self.assertEqual(self.get("/", {"If-None-Match": headers["ETag"]})[0], 304)
+
+    def test_missing_and_escaping_paths(self):
+        self.assertEqual(self.get("/missing")[0], 404)
+        self.assertEqual(self.get("/../template.html")[0], 404)
+
+    def test_basepath_is_stripped(self):
+        self.stop()
+        self.start("/site/")
+        self.assertIn('<a href="/site/">Home</a>', self.get("/site/blog/post/")[2])
+        self.assertEqual(self.get("/site")[0], 200)
+        self.assertEqual(self.get("/site/index.css")[0], 200)
+        self.assertEqual(self.get("/index.css")[0], 404)
+        self.assertEqual(self.get("/sitemap")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+
+from siteindex import LinkGraph, build_site_index, normalize_url, page_url
+from testsupport import TempDirTestCase
+
+class TestSiteIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.write("static/images/a.png", "png")
+        self.pages = [
+            self.page("index.md", "# Home\n\n[Blog](/blog/post) and [Missing](/nowhere)"),
+            self.page("blog/post/index.md", "# Post\n\n![A](/images/a.png) ![B](/images/b.png) [Home](/)"),
+            self.page("about.md", "# About\n\n[Post](blog/post/) [Site](https://example.com) [Top](#top)"),
+        ]
+
+    def page(self, rel_path, text):
+        return (self.write("content/" + rel_path, text), os.path.join(self.root, "docs", rel_path))
+
+    def test_page_url(self):
+        self.assertEqual(page_url(self.pages[0][0], self.content), "/")
+        self.assertEqual(page_url(self.pages[1][0], self.content), "/blog/post")
+        self.assertEqual(page_url(self.pages[2][0], self.content), "/about")
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url("/blog/post/", "/"), "/blog/post")
+        self.assertEqual(normalize_url("/blog/post/index.html#top", "/"), "/blog/post")
+        self.assertEqual(normalize_url("../post", "/blog/other"), "/blog/post")
+        self.assertEqual(normalize_url("post.html", "/blog"), "/blog/post")
+        self.assertIsNone(normalize_url("https://example.com/", "/"))
+        self.assertIsNone(normalize_url("#top", "/"))
+
+    def test_index_entries(self):
+        index = build_site_index(self.pages, self.content)
+        entry = index["pages"][self.pages[1][0]]
+        self.assertEqual(entry["title"], "Post")
+        self.assertEqual(entry["url"], "/blog/post")
+        self.assertEqual(entry["images"], ["/images/a.png", "/images/b.png"])
+        self.assertEqual(entry["links"], ["/"])
+
+    def test_unchanged_entries_are_reused(self):
+        previous = build_site_index(self.pages, self.content)
+        previous["pages"][self.pages[0][0]]["title"] = "Cached"
+        self.write("content/about.md", "# About us")
+        index = build_site_index(self.pages, self.content, previous)
+        self.assertEqual(index["pages"][self.pages[0][0]]["title"], "Cached")
+        self.assertEqual(index["pages"][self.pages[2][0]]["title"], "About us")
+        self.assertEqual(index["pages"][self.pages[2][0]]["links"], [])
+
+    def test_included_links_are_indexed(self):
+        self.write("content/_links.md", "[About](/about)")
+        pages = [self.page("links.md", "# Links\n\n{{> _links.md }}")]
+        previous = build_site_index(pages, self.content)
+        self.assertEqual(previous["pages"][pages[0][0]]["links"], ["/about"])
+        self.write("content/_links.md", "[Post](/blog/post)")
+        index = build_site_index(pages, self.content, previous)
+        self.assertEqual(index["pages"][pages[0][0]]["links"], ["/blog/post"])
+
+    def test_link_graph(self):
+        home, post, about = (source for source, _ in self.pages)
+        graph = LinkGraph(build_site_index(self.pages, self.content), self.static)
+        self.assertEqual(graph.broken, [(home, "/nowhere"), (post, "/images/b.png")])
+        self.assertEqual(graph.backlinks[post], {home, about})
+        self.assertEqual(graph.backlinks[home], {post})
+        self.assertEqual(graph.orphans(), [about])
+
+
+if __name__ == "__main__":
+    unittest.main()
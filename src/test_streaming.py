@@ -0,0 +1,80 @@
+import io
+import os
+import unittest
+
+from markdown_blocks import generate_page, generate_page_outputs, page_text
+from streaming import body_lines, scan_references
+from testsupport import TempDirTestCase
+
+PAGE = """<!-- author: Tom -->
+<!-- date: 2024-01-01 -->
+# Big page
+
+Some **bold** text with [a link](/other) and ![img](/images/a.png).
+
+```
+code
+
+with blank lines
+```
+
+- one
+- two
+
+> quoted
+"""
+
+class TestStreaming(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ author }}<a href=\"/\">x</a>{{ Content }}")
+        self.source = self.write("content/big.md", PAGE)
+
+    def test_body_lines_consumes_metadata(self):
+        metadata, lines = body_lines(io.StringIO(PAGE))
+        self.assertEqual(metadata, {"author": "Tom", "date": "2024-01-01"})
+        self.assertEqual(next(lines), "# Big page\n")
+
+    def test_streamed_page_matches_buffered_page(self):
+        buffered = os.path.join(self.root, "docs/buffered.html")
+        streamed = os.path.join(self.root, "docs/streamed.html")
+        expected = generate_page(self.source, self.template, buffered, "/site/", index_text=True)
+        result = generate_page(
+            self.source, self.template, streamed, "/site/", index_text=True, stream_threshold=0
+        )
+        self.assertEqual(self.read(streamed), self.read(buffered))
+        self.assertEqual(result["terms"], expected["terms"])
+        self.assertEqual((result["title"], result["deps"]), (expected["title"], expected["deps"]))
+
+    def test_streamed_outputs_match_buffered_outputs(self):
+        outputs = [(self.path("docs/a.html"), "/"), (self.path("docs/site/a.html"), "/site/")]
+        streamed = [(self.path("out/a.html"), "/"), (self.path("out/site/a.html"), "/site/")]
+        generate_page_outputs(self.source, self.template, outputs)
+        results = generate_page_outputs(self.source, self.template, streamed, stream_threshold=0)
+        self.assertEqual([result["dest"] for result in results], [dest for dest, _ in streamed])
+        self.assertEqual(self.read("out/a.html"), self.read("docs/a.html"))
+        self.assertEqual(self.read("out/site/a.html"), self.read("docs/site/a.html"))
+        self.assertIn('href="/site/other"', self.read("out/site/a.html"))
+
+    def test_unchanged_streamed_page_is_not_rewritten(self):
+        dest = os.path.join(self.root, "docs/big.html")
+        self.assertTrue(generate_page(self.source, self.template, dest, "/", stream_threshold=0)["written"])
+        os.utime(dest, ns=(0, 0))
+        self.assertFalse(generate_page(self.source, self.template, dest, "/", stream_threshold=0)["written"])
+        self.assertEqual(os.stat(dest).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(os.path.dirname(dest)), ["big.html"])
+
+    def test_scan_references(self):
+        metadata, title, links, images, includes = scan_references(self.source)
+        self.assertEqual((metadata["author"], title), ("Tom", "Big page"))
+        self.assertEqual((links, images), (["/other"], ["/images/a.png"]))
+
+    def test_page_text(self):
+        text = page_text(self.source)
+        self.assertIn("Big page", text)
+        self.assertIn("with blank lines", text)
+        self.assertNotIn("author", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import unittest
+
+from markdown_blocks import find_pages, generate_page, generate_page_outputs
+from siteindex import build_site_index, load_site_index, save_site_index
+from targets import group_outputs, overlay_pages, overlay_site_index, split_results
+from testsupport import TempDirTestCase
+
+class TestTargets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.overlay = os.path.join(self.root, "content.fr")
+        self.template = self.write("template.html", '<a href="/">{{ Title }}</a>{{ Content }}')
+        self.write("content/index.md", "# Home\n\n[About](/about.html) ![x](/x.png)")
+        self.write("content/about.md", "# About")
+        self.write("content.fr/about.md", "# A propos")
+        self.write("content.fr/only.md", "# Seulement")
+
+    def test_outputs_match_separate_renders(self):
+        source = os.path.join(self.content, "index.md")
+        outputs = [(self.path("a/index.html"), "/"), (self.path("b/index.html"), "/site/")]
+        results = generate_page_outputs(source, self.template, outputs, index_text=True)
+        generate_page(source, self.template, self.path("c/index.html"), "/site/")
+        self.assertEqual([result["dest"] for result in results], [dest for dest, _ in outputs])
+        self.assertEqual(results[0]["terms"], results[1]["terms"])
+        self.assertIn('<a href="/site/about.html">', self.read(self.path("b/index.html")))
+        self.assertIn('src="/x.png"', self.read(self.path("a/index.html")))
+        self.assertEqual(self.read(self.path("b/index.html")), self.read(self.path("c/index.html")))
+
+    def test_overlay_pages_replace_by_path(self):
+        pages = find_pages(self.content, self.path("fr"))
+        merged, overlay = overlay_pages(pages, self.overlay, self.path("fr"))
+        self.assertEqual(merged, [
+            (os.path.join(self.overlay, "about.md"), self.path("fr/about.html")),
+            (os.path.join(self.content, "index.md"), self.path("fr/index.html")),
+            (os.path.join(self.overlay, "only.md"), self.path("fr/only.html")),
+        ])
+        self.assertEqual(len(overlay), 2)
+        index = overlay_site_index(build_site_index(pages, self.content), overlay, self.overlay, {})
+        titles = sorted(entry["title"] for entry in index["pages"].values())
+        self.assertEqual(titles, ["A propos", "Home", "Seulement"])
+
+    def test_overlay_index_is_kept_between_builds(self):
+        pages = find_pages(self.content, self.path("fr"))
+        site_index = build_site_index(pages, self.content)
+        _, overlay = overlay_pages(pages, self.overlay, self.path("fr"))
+        state = self.path("cache/overlay_index.json")
+        overlay_site_index(site_index, overlay, self.overlay, {}, state)
+        # An entry whose source is unchanged comes from the saved index.
+        saved = load_site_index(state)
+        saved["pages"][os.path.join(self.overlay, "only.md")]["title"] = "Saved"
+        save_site_index(state, saved)
+        index = overlay_site_index(site_index, overlay, self.overlay, {}, state)
+        self.assertEqual(index["pages"][os.path.join(self.overlay, "only.md")]["title"], "Saved")
+
+    def test_group_and_split_results(self):
+        index = os.path.join(self.content, "index.md")
+        about = os.path.join(self.content, "about.md")
+        targets = [
+            {"basepath": "/", "to_render": [(index, "a/index.html"), (about, "a/about.html")]},
+            {"basepath": "/b/", "to_render": [(index, "b/index.html")]},
+        ]
+        items = group_outputs(targets)
+        self.assertEqual(items, [
+            (index, [("a/index.html", "/"), ("b/index.html", "/b/")]),
+            (about, [("a/about.html", "/")]),
+        ])
+        results = [{"dest": dest_path} for _, outputs in items for dest_path, _ in outputs]
+        split_results(results, targets)
+        self.assertEqual([len(target["results"]) for target in targets], [2, 1])
+        self.assertEqual(targets[1]["results"], [{"dest": "b/index.html"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from templates import (
+    Template, expand_partials, load_template, resolve_template_path, rewrite_basepath,
+    split_page_metadata,
+)
+
+class TestTemplates(unittest.TestCase):
+    def test_render_slots(self):
+        template = Template("t.html", "<title>{{ Title }}</title><main>{{Content}}</main>")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": ["<p>", "x", "</p>"]}),
+            "<title>Hi</title><main><p>x</p></main>",
+        )
+
+    def test_basepath_applied_at_compile_time(self):
+        template = Template("t.html", '<link href="/index.css"><img src="/a.png">{{ Content }}', "/site/")
+        self.assertEqual(
+            template.render({"Content": ""}),
+            '<link href="/site/index.css"><img src="/site/a.png">',
+        )
+
+    def test_missing_value_is_left_as_written(self):
+        template = Template("t.html", "<p>{{Author}}</p>{{ Title }}")
+        self.assertEqual(template.render({"Title": "Hi"}), "<p>{{Author}}</p>Hi")
+
+    def test_callable_value_can_repeat(self):
+        template = Template("t.html", "{{ Content }}|{{ Content }}")
+        self.assertEqual(template.render({"Content": lambda: iter(["a", "b"])}), "ab|ab")
+
+    def test_rewrite_basepath(self):
+        self.assertEqual(rewrite_basepath('<a href="/x">', "/"), '<a href="/x">')
+        self.assertEqual(rewrite_basepath('<a href="/x">', "/b/"), '<a href="/b/x">')
+
+    def test_split_page_metadata(self):
+        metadata, body = split_page_metadata("<!-- template: post.html -->\n<!-- Author: Me -->\n# Title")
+        self.assertEqual(metadata, {"template": "post.html", "Author": "Me"})
+        self.assertEqual(body, "# Title")
+        self.assertEqual(split_page_metadata("# Title"), ({}, "# Title"))
+
+    def test_resolve_template_path(self):
+        self.assertEqual(resolve_template_path("./template.html", {}), "./template.html")
+        self.assertEqual(
+            resolve_template_path("./template.html", {"template": "post.html"}),
+            os.path.join(".", "post.html"),
+        )
+
+    def test_load_template_is_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as file:
+                file.write("{{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as file:
+                file.write("<p>{{ Content }}</p>")
+            self.assertEqual(load_template(path).render({"Content": "x"}), "<p>x</p>")
+
+    def test_partials_are_inlined_and_tracked(self):
+        with tempfile.TemporaryDirectory() as root:
+            for rel_path, text in (
+                ("template.html", '{{> partials/head.html }}<main>{{ Content }}</main>'),
+                ("partials/head.html", '<link href="/a.css">{{> nav.html }}'),
+                ("partials/nav.html", "<nav>{{ Title }}</nav>"),
+            ):
+                os.makedirs(os.path.dirname(os.path.join(root, rel_path)), exist_ok=True)
+                with open(os.path.join(root, rel_path), "w") as file:
+                    file.write(text)
+            path = os.path.join(root, "template.html")
+            template = load_template(path, "/site/")
+            self.assertEqual(
+                template.render({"Title": "T", "Content": "x"}),
+                '<link href="/site/a.css"><nav>T</nav><main>x</main>',
+            )
+            nav = os.path.join(root, "partials", "nav.html")
+            self.assertEqual(template.deps, [os.path.join(root, "partials", "head.html"), nav])
+            with open(nav, "w") as file:
+                file.write("<nav>changed</nav>")
+            self.assertIn("changed", load_template(path, "/site/").render({"Content": "x"}))
+
+    def test_partial_errors(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "loop.html")
+            with open(path, "w") as file:
+                file.write("{{> loop.html }}")
+            with self.assertRaisesRegex(ValueError, "includes itself"):
+                expand_partials("{{> loop.html }}", path)
+            with self.assertRaisesRegex(ValueError, "not found"):
+                expand_partials("{{> missing.html }}", path)
+
+
+if __name__ == "__main__":
+    unittest.main()
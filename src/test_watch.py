@@ -0,0 +1,57 @@
+import os
+import unittest
+
+from manifest import new_manifest, record_page
+from markdown_blocks import find_pages, generate_page
+from testsupport import TempDirTestCase
+from watch import Watcher, changed_paths
+
+class TestWatcher(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "docs")
+        self.template = self.write("template.html", "<main>{{ Content }}</main>")
+        self.write("content/a.md", "# A")
+        self.write("content/sub/b.md", "# B")
+        self.write("static/index.css", "body {}")
+        manifest = new_manifest("/")
+        for from_path, dest_path in find_pages(self.content, self.public):
+            result = generate_page(from_path, self.template, dest_path, "/")
+            record_page(manifest, from_path, dest_path, result["deps"])
+        self.watcher = Watcher(
+            self.content, self.static, self.template, self.public, "/", manifest
+        )
+
+    def test_no_changes(self):
+        self.assertFalse(self.watcher.poll())
+
+    def test_changed_page_is_rerendered(self):
+        self.write("content/sub/b.md", "# B2", mtime=1)
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(self.read("docs/sub/b.html"), "<main><div><h1>B2</h1></div></main>")
+
+    def test_template_change_rerenders_dependents(self):
+        self.write("template.html", "<article>{{ Content }}</article>", mtime=1)
+        self.watcher.poll()
+        self.assertEqual(self.read("docs/a.html"), "<article><div><h1>A</h1></div></article>")
+        self.assertEqual(self.read("docs/sub/b.html"), "<article><div><h1>B</h1></div></article>")
+
+    def test_removed_page_output_is_deleted(self):
+        os.remove(os.path.join(self.content, "sub/b.md"))
+        self.watcher.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "sub/b.html")))
+
+    def test_static_change_is_synced(self):
+        self.write("static/new.css", "p {}")
+        self.watcher.poll()
+        self.assertEqual(self.read("docs/new.css"), "p {}")
+
+    def test_changed_paths(self):
+        changed, removed = changed_paths({"a": 1, "b": 2}, {"a": 1, "b": 3, "c": 1})
+        self.assertEqual((changed, removed), ({"b", "c"}, set()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+
+class TempDirTestCase(unittest.TestCase):
+    # Gives every test a fresh temporary directory at self.root. Paths
+    # passed to path(), write() and read() are relative to it; absolute
+    # paths are used as they are.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, data, mtime=None):
+        # Text is written without newline translation, bytes as they are.
+        path = self.path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(data, bytes):
+            file = open(path, "wb")
+        else:
+            file = open(path, "w", newline="")
+        with file:
+            file.write(data)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def read(self, rel_path):
+        with open(self.path(rel_path)) as file:
+            return file.read()
@@ -151,6 +151,30 @@ class TestUtility(unittest.TestCase):
         ]
         self.assertEqual(split_text, desired_result)
 
+    def test_text_to_textnodes_link_dense(self):
+        text = "[a](/a) and [b](/b)[c](/c) then ![i](/i.png)"
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("a", TextType.LINK, "/a"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("b", TextType.LINK, "/b"),
+                TextNode("c", TextType.LINK, "/c"),
+                TextNode(" then ", TextType.TEXT),
+                TextNode("i", TextType.IMAGE, "/i.png"),
+            ],
+        )
+
+    def test_text_to_textnodes_unmatched_brackets_stay_text(self):
+        self.assertEqual(
+            text_to_textnodes("a [b] and ![c] d"),
+            [TextNode("a [b] and ![c] d", TextType.TEXT)],
+        )
+
+    def test_text_to_textnodes_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("this is **not closed")
+
     def test_markdown_to_blocks(self):
         md = """
             This is **bolded** paragraph
@@ -1,3 +1,4 @@
+from blocktypes import scan_blocks
 from textnode import TextNode, TextType
 import re
 
@@ -85,29 +86,55 @@ def split_nodes_link(old_nodes):
             new_nodes.append(TextNode(original_text, TextType.TEXT))
     return new_nodes
 
+INLINE_DELIMITERS = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+inline_token_pattern = re.compile(r"\*\*|[_`]|!\[|\[")
+image_pattern = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+link_pattern = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def text_to_textnodes(text):
-    if text == "":
-        return []
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # Single left-to-right scan; text between tokens is only sliced out when
+    # a formatted node is emitted.
+    nodes = []
+    start = 0
+    pos = 0
+    length = len(text)
+    while pos < length:
+        match = inline_token_pattern.search(text, pos)
+        if match is None:
+            break
+        token = match.group()
+        index = match.start()
+        if token in INLINE_DELIMITERS:
+            content_start = index + len(token)
+            end = text.find(token, content_start)
+            if end == -1:
+                raise ValueError("invalid markdown, formatted section not closed")
+            if index > start:
+                nodes.append(TextNode(text[start:index], TextType.TEXT))
+            if end > content_start:
+                nodes.append(TextNode(text[content_start:end], INLINE_DELIMITERS[token]))
+            start = pos = end + len(token)
+            continue
+        if token == "![":
+            found = image_pattern.match(text, index)
+            text_type = TextType.IMAGE
+        else:
+            found = link_pattern.match(text, index)
+            text_type = TextType.LINK
+        if found is None:
+            pos = match.end()
+            continue
+        if index > start:
+            nodes.append(TextNode(text[start:index], TextType.TEXT))
+        nodes.append(TextNode(found.group(1), text_type, found.group(2)))
+        start = pos = found.end()
+    if start < length:
+        nodes.append(TextNode(text[start:], TextType.TEXT))
     return nodes
 
 def markdown_to_blocks(markdown):
-    split_markdown = markdown.split("\n\n")
-    result_list = []
-    for item in split_markdown:
-        stripped_item = item.strip()
-        if stripped_item:
-            if "\n" in stripped_item:
-                split_stripped_item = stripped_item.split("\n")
-                inner_list = []
-                for inner_item in split_stripped_item:
-                    inner_list.append(inner_item.strip())
-                stripped_item = "\n".join(inner_list)
-            result_list.append(stripped_item)
-    return result_list
-     
\ No newline at end of file
+    return [block.text for block in scan_blocks(markdown.split("\n"))]
@@ -0,0 +1,135 @@
+import logging
+import os
+import time
+from copystatic import DEFAULT_IGNORE, is_ignored, sync_files
+from manifest import record_page, remove_outputs, save_manifest
+from loader import page_dest_path
+from markdown_blocks import generate_page
+
+logger = logging.getLogger(__name__)
+
+# Includes under "_" names are not pages; they are watched as dependencies.
+CONTENT_IGNORE = DEFAULT_IGNORE + ("_*",)
+
+def snapshot_tree(root, suffix="", ignore=DEFAULT_IGNORE):
+    files = {}
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if is_ignored(entry.name, ignore):
+                    continue
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.endswith(suffix):
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+def snapshot_files(paths):
+    files = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+def changed_paths(old, new):
+    changed = {path for path, stamp in new.items() if old.get(path) != stamp}
+    removed = set(old) - set(new)
+    return changed, removed
+
+class Watcher():
+    # Polls the content tree, the static tree and every non-source file a
+    # page was rendered from, and re-renders only the pages affected.
+    def __init__(self, dir_path_content, dir_path_static, template_path, dir_path_public,
+                 basepath, manifest, manifest_path=None, sync_options=None, block_cache=None,
+                 minify=False, images=None):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.dir_path_public = dir_path_public
+        self.basepath = basepath
+        self.manifest = manifest
+        self.manifest_path = manifest_path
+        self.sync_options = sync_options or {}
+        self.block_cache = block_cache
+        self.minify = minify
+        self.images = images
+        self.content = snapshot_tree(dir_path_content, ".md", CONTENT_IGNORE)
+        self.static = snapshot_tree(dir_path_static)
+        self.deps = snapshot_files(self.dependency_paths())
+
+    def dependency_paths(self):
+        paths = {self.template_path}
+        for source, entry in self.manifest["pages"].items():
+            paths.update(path for path in entry["deps"] if path != source)
+        return paths
+
+    def dependents(self, paths):
+        return {
+            source for source, entry in self.manifest["pages"].items()
+            if not paths.isdisjoint(entry["deps"])
+        }
+
+    def poll(self):
+        content = snapshot_tree(self.dir_path_content, ".md", CONTENT_IGNORE)
+        changed, removed = changed_paths(self.content, content)
+        self.content = content
+        deps = snapshot_files(self.dependency_paths())
+        changed_deps, removed_deps = changed_paths(self.deps, deps)
+        self.deps = deps
+        changed |= self.dependents(changed_deps | removed_deps) - removed
+
+        static = snapshot_tree(self.dir_path_static)
+        static_changed = static != self.static
+        self.static = static
+
+        if not changed and not removed and not static_changed:
+            return False
+        start = time.perf_counter()
+        if static_changed:
+            stats = sync_files(self.dir_path_static, self.dir_path_public, **self.sync_options)
+            logger.info(f"Synced {stats['copied']} static files, removed {stats['removed']}")
+            if self.images is not None:
+                self.images.refresh()
+        stale = []
+        for source in removed:
+            entry = self.manifest["pages"].pop(source, None)
+            if entry is not None:
+                stale.append(entry["dest"])
+        remove_outputs(stale, self.dir_path_public)
+        hashes = {}
+        for source in sorted(changed):
+            dest_path = page_dest_path(source, self.dir_path_content, self.dir_path_public)
+            try:
+                result = generate_page(
+                    source, self.template_path, dest_path, self.basepath, self.block_cache,
+                    minify=self.minify, images=self.images,
+                )
+            except Exception as e:
+                logger.error(f"Failed to generate {source}: {e}")
+                continue
+            record_page(self.manifest, source, dest_path, result["deps"], hashes)
+        if self.manifest_path is not None:
+            save_manifest(self.manifest_path, self.manifest)
+        # Templates picked up by re-rendered pages need watching too.
+        self.deps = snapshot_files(self.dependency_paths())
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Rebuilt {len(changed)} pages, removed {len(removed)} in {elapsed:.1f}ms")
+        return True
+
+    def run(self, interval=0.1):
+        logger.info(f"Watching {self.dir_path_content}, {self.dir_path_static} and templates (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll()
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")